@@ -33,6 +33,7 @@ Requirements:
     'depends': [
         'base',
         'web',
+        'bus',
         'mail',
         'product',
     ],
@@ -1,11 +1,110 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import json
 
 from odoo import http
 from odoo.http import request
+from odoo.tools import date_utils
+
+from ..models.qz_print_service import QZ_PRINT_CHANNEL
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_PRINTER_LIST_FIELDS = [
+    'id', 'name', 'system_name', 'printer_type', 'paper_size',
+    'orientation', 'print_quality', 'location_id', 'department',
+    'is_default', 'priority', 'supports_pdf', 'supports_html',
+    'supports_escpos', 'supports_zpl',
+]
+
+_PRINTER_CONFIG_FIELDS = _PRINTER_LIST_FIELDS + ['active']
+
+_JSON_HEADERS = [('Content-Type', 'application/json; charset=utf-8')]
+
+
+def _serialize_printer(values):
+    """Project a qz.printer read() dict to the shape expected by the frontend"""
+    location = values['location_id']
+    values['location_id'] = location[0] if location else False
+    values['location_name'] = location[1] if location else ''
+    values['department'] = values['department'] or ''
+    return values
+
+
+def _json_encode(payload):
+    """
+    Encode a payload to JSON bytes for the read-heavy GET endpoints.
+    
+    Uses orjson when it is installed, otherwise Odoo's standard encoder.
+    """
+    if orjson is None:
+        return json.dumps(payload, ensure_ascii=False, default=date_utils.json_default).encode('utf-8')
+    return orjson.dumps(payload)
+
+
+def _json_response(payload):
+    """Build a plain JSON HTTP response for the read-heavy GET endpoints"""
+    return request.make_response(_json_encode(payload), headers=_JSON_HEADERS)
+
+
+def job_route(path, type='json'):
+    """
+    Declare a route operating on a single print job.
+    
+    The wrapped handler receives the job record instead of its ID. Missing
+    jobs and exceptions are turned into the usual error response, and a
+    handler returning nothing answers {'success': True}. With type='http'
+    the route answers GET requests with a plain JSON body.
+    """
+    def decorator(func):
+        routing = {'type': type, 'auth': 'user'}
+        if type == 'http':
+            routing['methods'] = ['GET']
+        
+        @http.route(path, **routing)
+        def wrapper(self, job_id, **kwargs):
+            job = self._jobs.browse(job_id).exists()
+            if not job:
+                result = {
+                    'success': False,
+                    'error': 'Job not found',
+                }
+            else:
+                try:
+                    result = func(self, job, **kwargs) or {'success': True}
+                except Exception as e:
+                    result = {
+                        'success': False,
+                        'error': str(e),
+                    }
+            return _json_response(result) if type == 'http' else result
+        # Keep the handler name so controller overrides still match
+        wrapper.__name__ = func.__name__
+        wrapper.__qualname__ = func.__qualname__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
 
 
 class QZTrayController(http.Controller):
     
+    # Controller instances are shared by all requests of a routing map, so
+    # these must resolve against the current request every time
+    @property
+    def _print_service(self):
+        return request.env['qz.print.service']
+    
+    @property
+    def _jobs(self):
+        return request.env['qz.print.job']
+    
+    @property
+    def _printers(self):
+        return request.env['qz.printer']
+    
     @http.route('/qz_tray/get_certificates', type='json', auth='user')
     def get_certificates(self):
         """Get QZ Tray certificates for authentication"""
@@ -33,11 +132,28 @@ class QZTrayController(http.Controller):
             if options is None:
                 options = {}
             
-            # Get the print service
-            print_service = request.env['qz.print.service']
+            print_service = self._print_service
+            
+            # Defer rendering and job creation to queue_job when available
+            if print_service._queue_job_available():
+                delayed = print_service.with_delay(
+                    max_retries=5,
+                    channel=QZ_PRINT_CHANNEL,
+                    description=f'Print {document_type}',
+                ).print_document(
+                    template=document_type,
+                    data=data,
+                    printer=printer_id,
+                    **options
+                )
+                return {
+                    'success': True,
+                    'queued': True,
+                    'job_uuid': delayed.uuid,
+                }
             
             # Create print job
-            job = print_service.print_document(
+            result = print_service.print_document(
                 template=document_type,
                 data=data,
                 printer=printer_id,
@@ -46,7 +162,7 @@ class QZTrayController(http.Controller):
             
             return {
                 'success': True,
-                'job_id': job.id,
+                'job_id': result['job_id'],
             }
         except Exception as e:
             return {
@@ -61,11 +177,28 @@ class QZTrayController(http.Controller):
             if options is None:
                 options = {}
             
-            # Get the print service
-            print_service = request.env['qz.print.service']
+            print_service = self._print_service
+            
+            # Defer rendering and job creation to queue_job when available
+            if print_service._queue_job_available():
+                delayed = print_service.with_delay(
+                    max_retries=5,
+                    channel=QZ_PRINT_CHANNEL,
+                    description=f'Print raw {format}',
+                ).print_raw(
+                    data=data,
+                    format=format,
+                    printer=printer_id,
+                    **options
+                )
+                return {
+                    'success': True,
+                    'queued': True,
+                    'job_uuid': delayed.uuid,
+                }
             
             # Create print job
-            job = print_service.print_raw(
+            result = print_service.print_raw(
                 data=data,
                 format=format,
                 printer=printer_id,
@@ -74,7 +207,7 @@ class QZTrayController(http.Controller):
             
             return {
                 'success': True,
-                'job_id': job.id,
+                'job_id': result['job_id'],
             }
         except Exception as e:
             return {
@@ -82,43 +215,33 @@ class QZTrayController(http.Controller):
                 'error': str(e),
             }
     
-    @http.route('/qz_tray/job/<int:job_id>/status', type='json', auth='user')
-    def get_job_status(self, job_id):
+    @job_route('/qz_tray/job/<int:job_id>/status', type='http')
+    def get_job_status(self, job):
         """Get status of a print job"""
-        try:
-            job = request.env['qz.print.job'].browse(job_id)
-            
-            if not job.exists():
-                return {
-                    'error': 'Job not found',
-                }
-            
-            # Check if printer is offline
-            printer_offline = False
-            if job.printer_id:
-                printer_offline = not job.printer_id.active
-            
-            return {
-                'success': True,
-                'job_id': job.id,
-                'state': job.state,
-                'error_message': job.error_message or '',
-                'printer_offline': printer_offline,
-                'submitted_date': job.submitted_date.isoformat() if job.submitted_date else None,
-                'completed_date': job.completed_date.isoformat() if job.completed_date else None,
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-            }
+        values = job.read([
+            'state', 'error_message', 'printer_id', 'submitted_date', 'completed_date',
+        ])[0]
+        
+        # Check if printer is offline
+        printer_offline = False
+        if job.printer_id:
+            printer_offline = not job.printer_id.active
+        
+        return {
+            'success': True,
+            'job_id': job.id,
+            'state': values['state'],
+            'error_message': values['error_message'] or '',
+            'printer_offline': printer_offline,
+            'submitted_date': values['submitted_date'].isoformat() if values['submitted_date'] else None,
+            'completed_date': values['completed_date'].isoformat() if values['completed_date'] else None,
+        }
     
     @http.route('/qz_tray/preview', type='json', auth='user')
     def generate_preview(self, document_type, data):
         """Generate document preview"""
         try:
-            # Get the print service
-            print_service = request.env['qz.print.service']
+            print_service = self._print_service
             
             # Generate preview
             preview = print_service.preview_document(
@@ -136,94 +259,57 @@ class QZTrayController(http.Controller):
                 'error': str(e),
             }
     
-    @http.route('/qz_tray/job/cancel', type='json', auth='user')
-    def cancel_job(self, job_id):
+    @job_route('/qz_tray/job/cancel')
+    def cancel_job(self, job):
         """Cancel a print job"""
-        try:
-            job = request.env['qz.print.job'].browse(job_id)
-            
-            if not job.exists():
-                return {
-                    'success': False,
-                    'error': 'Job not found',
-                }
-            
-            job.cancel_job()
-            
-            return {
-                'success': True,
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-            }
+        job.cancel_job()
     
-    @http.route('/qz_tray/job/retry', type='json', auth='user')
-    def retry_job(self, job_id):
+    @job_route('/qz_tray/job/retry')
+    def retry_job(self, job):
         """Retry a failed print job"""
-        try:
-            job = request.env['qz.print.job'].browse(job_id)
-            
-            if not job.exists():
-                return {
-                    'success': False,
-                    'error': 'Job not found',
-                }
-            
-            job.retry_job()
-            
-            return {
-                'success': True,
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-            }
+        job.retry_job()
     
-    @http.route('/qz_tray/printers', type='json', auth='user')
+    @http.route('/qz_tray/printers', type='http', auth='user', methods=['GET'])
     def get_printers(self):
-        """Get list of configured printers"""
+        """
+        Get list of configured printers
+        
+        The response carries an ETag; a request whose If-None-Match matches
+        the current printer list gets an empty 304 response.
+        """
         try:
-            printers = request.env['qz.printer'].search([('active', '=', True)])
-            
-            printer_list = []
-            for printer in printers:
-                printer_list.append({
-                    'id': printer.id,
-                    'name': printer.name,
-                    'system_name': printer.system_name,
-                    'printer_type': printer.printer_type,
-                    'paper_size': printer.paper_size,
-                    'orientation': printer.orientation,
-                    'print_quality': printer.print_quality,
-                    'location_id': printer.location_id.id if printer.location_id else False,
-                    'location_name': printer.location_id.name if printer.location_id else '',
-                    'department': printer.department or '',
-                    'is_default': printer.is_default,
-                    'priority': printer.priority,
-                    'supports_pdf': printer.supports_pdf,
-                    'supports_html': printer.supports_html,
-                    'supports_escpos': printer.supports_escpos,
-                    'supports_zpl': printer.supports_zpl,
-                })
-            
-            return {
+            printer_list = self._printers.search_read(
+                [('active', '=', True)], _PRINTER_LIST_FIELDS
+            )
+            for printer in printer_list:
+                _serialize_printer(printer)
+            # Encode once; the ETag is the hash of the exact body sent
+            body = _json_encode({
                 'success': True,
                 'printers': printer_list,
-            }
+            })
+            etag = hashlib.md5(body, usedforsecurity=False).hexdigest()
+            
+            # Unchanged since the client's last poll: answer without a body
+            if request.httprequest.if_none_match.contains(etag):
+                response = request.make_response('', status=304)
+            else:
+                response = request.make_response(body, headers=_JSON_HEADERS)
+            response.set_etag(etag)
+            # Make browsers revalidate every poll instead of reusing a stale copy
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         except Exception as e:
-            return {
+            return _json_response({
                 'success': False,
                 'error': str(e),
-            }
+            })
     
     @http.route('/qz_tray/printer/<int:printer_id>/test', type='json', auth='user')
     def test_printer_connection(self, printer_id):
         """Test printer connection"""
         try:
-            printer = request.env['qz.printer'].browse(printer_id)
+            printer = self._printers.browse(printer_id)
             
             if not printer.exists():
                 return {
@@ -233,12 +319,13 @@ class QZTrayController(http.Controller):
             
             # Return printer information for frontend to test
             # Actual test will be performed by JavaScript/QZ Tray
+            values = printer.read(['name', 'system_name', 'printer_type', 'active'])[0]
             return {
                 'success': True,
                 'printer_id': printer.id,
-                'printer_name': printer.system_name or printer.name,
-                'printer_type': printer.printer_type,
-                'active': printer.active,
+                'printer_name': values['system_name'] or values['name'],
+                'printer_type': values['printer_type'],
+                'active': values['active'],
             }
         except Exception as e:
             return {
@@ -250,7 +337,7 @@ class QZTrayController(http.Controller):
     def get_printer_config(self, printer_id):
         """Get printer configuration"""
         try:
-            printer = request.env['qz.printer'].browse(printer_id)
+            printer = self._printers.browse(printer_id)
             
             if not printer.exists():
                 return {
@@ -258,27 +345,11 @@ class QZTrayController(http.Controller):
                     'error': 'Printer not found',
                 }
             
+            values = printer.read(_PRINTER_CONFIG_FIELDS)[0]
+            
             return {
                 'success': True,
-                'printer': {
-                    'id': printer.id,
-                    'name': printer.name,
-                    'system_name': printer.system_name,
-                    'printer_type': printer.printer_type,
-                    'paper_size': printer.paper_size,
-                    'orientation': printer.orientation,
-                    'print_quality': printer.print_quality,
-                    'location_id': printer.location_id.id if printer.location_id else False,
-                    'location_name': printer.location_id.name if printer.location_id else '',
-                    'department': printer.department or '',
-                    'is_default': printer.is_default,
-                    'priority': printer.priority,
-                    'active': printer.active,
-                    'supports_pdf': printer.supports_pdf,
-                    'supports_html': printer.supports_html,
-                    'supports_escpos': printer.supports_escpos,
-                    'supports_zpl': printer.supports_zpl,
-                }
+                'printer': _serialize_printer(values),
             }
         except Exception as e:
             return {
@@ -290,7 +361,7 @@ class QZTrayController(http.Controller):
     def update_printer_settings(self, printer_id, **settings):
         """Update printer settings"""
         try:
-            printer = request.env['qz.printer'].browse(printer_id)
+            printer = self._printers.browse(printer_id)
             
             if not printer.exists():
                 return {
@@ -324,52 +395,26 @@ class QZTrayController(http.Controller):
                 'error': str(e),
             }
     
-    @http.route('/qz_tray/job/<int:job_id>/resubmit', type='json', auth='user')
-    def resubmit_job(self, job_id):
+    @job_route('/qz_tray/job/<int:job_id>/resubmit')
+    def resubmit_job(self, job):
         """Resubmit a failed print job"""
-        try:
-            job = request.env['qz.print.job'].browse(job_id)
-            
-            if not job.exists():
-                return {
-                    'success': False,
-                    'error': 'Job not found',
-                }
-            
-            # Create a new job with the same parameters
-            new_job = request.env['qz.print.job'].create({
-                'document_type': job.document_type,
-                'printer_id': job.printer_id.id,
-                'user_id': request.env.user.id,
-                'data': job.data,
-                'data_format': job.data_format,
-                'template_id': job.template_id.id if job.template_id else False,
-                'template_data': job.template_data,
-                'copies': job.copies,
-                'priority': job.priority,
-                'parent_model': job.parent_model,
-                'parent_id': job.parent_id,
-            })
-            
-            # Submit the new job
-            new_job.submit_job()
-            
-            return {
-                'success': True,
-                'job_id': new_job.id,
-                'original_job_id': job.id,
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-            }
+        # Copy the job; state, dates, retries and errors are not copied
+        new_job = job.copy(default={'user_id': request.env.user.id})
+        
+        # Submit the new job
+        new_job.submit_job()
+        
+        return {
+            'success': True,
+            'job_id': new_job.id,
+            'original_job_id': job.id,
+        }
     
     @http.route('/qz_tray/printer/<int:printer_id>/pause', type='json', auth='user')
     def pause_printer(self, printer_id):
         """Pause a printer (stop processing jobs)"""
         try:
-            printer = request.env['qz.printer'].browse(printer_id)
+            printer = self._printers.browse(printer_id)
             
             if not printer.exists():
                 return {
@@ -395,7 +440,7 @@ class QZTrayController(http.Controller):
     def resume_printer(self, printer_id):
         """Resume a paused printer"""
         try:
-            printer = request.env['qz.printer'].browse(printer_id)
+            printer = self._printers.browse(printer_id)
             
             if not printer.exists():
                 return {
@@ -407,7 +452,7 @@ class QZTrayController(http.Controller):
             printer.write({'active': True})
             
             # Get queued jobs for this printer
-            queued_jobs = request.env['qz.print.job'].search([
+            queued_jobs = self._jobs.search([
                 ('printer_id', '=', printer.id),
                 ('state', '=', 'queued')
             ], order='submitted_date asc, priority desc')
@@ -434,30 +479,45 @@ class QZTrayController(http.Controller):
                     'error': 'Invalid printers data',
                 }
             
-            Printer = request.env['qz.printer']
-            new_count = 0
-            updated_count = 0
-            
-            for printer_name in printers:
-                # Check if printer already exists
-                existing_printer = Printer.search([
-                    ('system_name', '=', printer_name)
-                ], limit=1)
-                
-                if existing_printer:
-                    # Update existing printer (mark as active if it was inactive)
-                    if not existing_printer.active:
-                        existing_printer.write({'active': True})
-                        updated_count += 1
-                else:
-                    # Create new printer record
-                    Printer.create({
-                        'name': printer_name,
-                        'system_name': printer_name,
-                        'printer_type': 'other',  # Default type, user can change later
-                        'active': True,
-                    })
-                    new_count += 1
+            # Ordered de-duplication, ignoring anything that is not a name
+            names = list(dict.fromkeys(
+                p.strip() for p in printers if isinstance(p, str) and p.strip()
+            ))
+            
+            max_printers = int(request.env['ir.config_parameter'].sudo().get_param(
+                'qz_tray.sync_printers_max', default=500
+            ))
+            if len(names) > max_printers:
+                return {
+                    'success': False,
+                    'error': 'Too many printers (maximum %d)' % max_printers,
+                }
+            
+            # Include archived printers so they can be reactivated
+            Printer = self._printers.with_context(active_test=False)
+            existing = Printer.search_read(
+                [('system_name', 'in', names)],
+                ['id', 'system_name', 'active']
+            )
+            by_name = {record['system_name']: record for record in existing}
+            
+            # Mark existing printers as active if they were inactive
+            to_activate_ids = [record['id'] for record in existing if not record['active']]
+            if to_activate_ids:
+                Printer.browse(to_activate_ids).write({'active': True})
+            
+            # Create the missing printers in a single call
+            missing = [name for name in names if name not in by_name]
+            if missing:
+                Printer.create([{
+                    'name': name,
+                    'system_name': name,
+                    'printer_type': 'other',  # Default type, user can change later
+                    'active': True,
+                } for name in missing])
+            
+            new_count = len(missing)
+            updated_count = len(to_activate_ids)
             
             return {
                 'success': True,
@@ -1,11 +1,26 @@
 # -*- coding: utf-8 -*-
 import logging
+
 from odoo import models, api, _
 from odoo.exceptions import UserError
 
+from .qz_print_service import QZ_PRINT_CHANNEL
+
 _logger = logging.getLogger(__name__)
 
 
+def _autoprint_enabled(env):
+    """
+    Check the qz_tray.autoprint_enabled system parameter.
+    
+    get_param is ormcached, so the POS order save path doesn't query
+    ir.config_parameter on every order.
+    """
+    return env['ir.config_parameter'].sudo().get_param(
+        'qz_tray.autoprint_enabled', default='True'
+    ) == 'True'
+
+
 class PosOrder(models.Model):
     """
     Extend POS Order model to add receipt printing capabilities.
@@ -34,7 +49,7 @@ class PosOrder(models.Model):
             
         Validates: Requirements 5.1, 5.2, 5.3, 5.4
         """
-        _logger.info(f'print_pos_receipt called for order {order_id}')
+        _logger.info('print_pos_receipt called for order %s', order_id)
         
         try:
             # Get the order
@@ -55,7 +70,7 @@ class PosOrder(models.Model):
             )
             
             _logger.info(
-                f'Receipt print job {result["job_id"]} created for order {order.name}'
+                'Receipt print job %s created for order %s', result['job_id'], order.name
             )
             
             return {
@@ -66,7 +81,11 @@ class PosOrder(models.Model):
             }
             
         except Exception as e:
-            _logger.error(f'Failed to print POS receipt: {str(e)}')
+            _logger.error('Failed to print POS receipt: %s', e)
+            # As a queued job nobody reads the result, and no print job
+            # status reaches the bus; fail the queue job so it is reported
+            if self.env.context.get('job_uuid'):
+                raise
             return {
                 'success': False,
                 'error': str(e),
@@ -82,16 +101,25 @@ class PosOrder(models.Model):
         Returns:
             dict: Receipt data formatted for printing
         """
-        # Prepare line items
+        # Warm the cache with batched SELECTs for everything read below
+        order.read(['name', 'date_order', 'amount_total', 'amount_tax', 'partner_id'])
+        order.lines.product_id.mapped('name')
+        order.payment_ids.payment_method_id.mapped('name')
+        
+        # Prepare line items and accumulate the discount in the same pass
         lines = []
+        amount_discount = 0.0
         for line in order.lines:
+            discount = line.discount
             lines.append({
                 'name': line.product_id.name,
                 'quantity': line.qty,
                 'price_unit': line.price_unit,
                 'price_subtotal': line.price_subtotal_incl,
-                'discount': line.discount,
+                'discount': discount,
             })
+            if discount > 0:
+                amount_discount += line.price_subtotal * discount / 100.0
         
         # Prepare payment information
         payments = []
@@ -101,16 +129,19 @@ class PosOrder(models.Model):
                 'amount': payment.amount,
             })
         
+        amount_total = order.amount_total
+        amount_tax = order.amount_tax
+        amount_untaxed = amount_total - amount_tax
+        
         # Build receipt data
         receipt_data = {
             'name': order.name,
             'date': order.date_order,
             'lines': lines,
-            'amount_untaxed': order.amount_total - order.amount_tax,
-            'amount_tax': order.amount_tax,
-            'amount_total': order.amount_total,
-            'amount_discount': sum(line.price_subtotal * line.discount / 100 
-                                  for line in order.lines if line.discount > 0),
+            'amount_untaxed': amount_untaxed,
+            'amount_tax': amount_tax,
+            'amount_total': amount_total,
+            'amount_discount': amount_discount,
             'payments': payments,
         }
         
@@ -131,6 +162,24 @@ class PosOrder(models.Model):
         """
         self.ensure_one()
         
+        # Enqueue and return right away; the final job status is pushed
+        # to the user over the bus by qz.print.job
+        if self._queue_job_available():
+            self.with_delay(
+                description=f'Receipt {self.name}',
+                channel=QZ_PRINT_CHANNEL,
+            ).print_pos_receipt(self.id)
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Receipt Printing'),
+                    'message': _('Receipt for %s queued for printing') % self.name,
+                    'type': 'info',
+                    'sticky': False,
+                }
+            }
+        
         result = self.print_pos_receipt(self.id)
         
         if result['success']:
@@ -171,28 +220,37 @@ class PosOrder(models.Model):
         # Call parent method to process the order
         order = super(PosOrder, self)._process_saved_order(draft)
         
+        # Skip everything when automatic printing is disabled globally
+        if not _autoprint_enabled(self.env):
+            return order
+        
         # Check if automatic printing is enabled for this session
         if order.session_id.config_id:
             config = order.session_id.config_id
             # Check if auto-print is enabled (this would be a custom field on pos.config)
             # For now, we'll check if there's a receipt printer configured
-            receipt_printer = self.env['qz.printer'].search([
-                ('printer_type', '=', 'receipt'),
-                ('is_default', '=', True),
-                ('active', '=', True),
-            ], limit=1)
+            QZPrinter = self.env['qz.printer']
+            printer_id = QZPrinter._default_receipt_printer_id()
+            receipt_printer = QZPrinter.browse(printer_id) if printer_id else QZPrinter
             
             if receipt_printer:
                 _logger.info(
-                    f'Auto-printing receipt for order {order.name} '
-                    f'to printer {receipt_printer.name}'
+                    'Auto-printing receipt for order %s to printer %s',
+                    order.name, receipt_printer.name
                 )
                 try:
-                    self.print_pos_receipt(order.id, printer=receipt_printer.id, auto_print=True)
+                    # Don't hold up order validation when queue_job is installed
+                    if self._queue_job_available():
+                        self.with_delay(
+                            description=f'Receipt {order.name}',
+                            channel=QZ_PRINT_CHANNEL,
+                        ).print_pos_receipt(order.id, printer=receipt_printer.id, auto_print=True)
+                    else:
+                        self.print_pos_receipt(order.id, printer=receipt_printer.id, auto_print=True)
                 except Exception as e:
                     # Log error but don't fail the order processing
                     _logger.error(
-                        f'Auto-print failed for order {order.name}: {str(e)}'
+                        'Auto-print failed for order %s: %s', order.name, e
                     )
         
         return order
@@ -1,10 +1,33 @@
 # -*- coding: utf-8 -*-
 import logging
+
 from odoo import models, api, _
 from odoo.exceptions import UserError
 
+from .qz_print_service import QZ_PRINT_CHANNEL
+
 _logger = logging.getLogger(__name__)
 
+# Shared shape of the notifications returned by the label actions
+_NOTIFICATION_TEMPLATE = {
+    'type': 'ir.actions.client',
+    'tag': 'display_notification',
+    'params': {'type': 'success', 'sticky': False},
+}
+
+
+def _notification(title, message, notification_type='success'):
+    """Build a display_notification client action from the shared template"""
+    return {
+        **_NOTIFICATION_TEMPLATE,
+        'params': {
+            **_NOTIFICATION_TEMPLATE['params'],
+            'title': title,
+            'message': message,
+            'type': notification_type,
+        },
+    }
+
 
 class ProductProduct(models.Model):
     """
@@ -24,9 +47,11 @@ class ProductProduct(models.Model):
         Returns:
             dict: Action result with notification
         """
-        self.ensure_one()
+        if len(self) != 1:
+            raise UserError(_('Exactly one product is required to print a label'))
         
-        _logger.info(f'Printing label for product {self.id}: {self.name}')
+        if _logger.isEnabledFor(logging.INFO):
+            _logger.info('Printing label for product %s: %s', self.id, self.name)
         
         try:
             # Prepare label data
@@ -38,21 +63,18 @@ class ProductProduct(models.Model):
             # Print the label
             result = self.print_label(label_data)
             
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Label Print Submitted'),
-                    'message': _('Label print job %s has been submitted for product %s') % (
-                        result['job_id'], self.name
-                    ),
-                    'type': 'success',
-                    'sticky': False,
-                }
-            }
+            return _notification(
+                _('Label Print Submitted'),
+                _('Label print job %s has been submitted for product %s') % (
+                    result['job_id'], self.name
+                ),
+            )
+        except UserError:
+            # Already a user-facing message (missing printer, invalid data, ...)
+            raise
         except Exception as e:
-            _logger.error(f'Failed to print label for product {self.id}: {str(e)}')
-            raise UserError(_('Failed to print label: %s') % str(e))
+            _logger.error('Failed to print label for product %s: %s', self.id, e)
+            raise UserError(_('Failed to print label: %s') % e)
 
     def action_print_labels_batch(self):
         """
@@ -66,36 +88,56 @@ class ProductProduct(models.Model):
         if not self:
             raise UserError(_('No products selected'))
         
-        _logger.info(f'Printing batch labels for {len(self)} products')
+        # Drop duplicate selections, keeping the original order
+        product_ids = list(dict.fromkeys(self.ids))
+        if len(product_ids) < len(self):
+            _logger.info('Ignoring %d duplicate products in batch label print',
+                         len(self) - len(product_ids))
+        
+        # A single product does not need the batch path
+        if len(product_ids) == 1:
+            return self.browse(product_ids).action_print_label()
+        
+        _logger.info('Printing batch labels for %d products', len(product_ids))
         
         try:
             # Prepare label data for all products
-            labels_data = []
-            for product in self:
-                label_data = {
-                    'product_id': product.id,
-                    'date': self.env.context.get('label_date'),
-                }
-                labels_data.append(label_data)
+            label_date = self.env.context.get('label_date')
+            labels_data = [
+                {'product_id': product_id, 'date': label_date}
+                for product_id in product_ids
+            ]
+            
+            # Large batches hold the HTTP worker until every label is
+            # rendered, so hand them to a background job when possible
+            if self._queue_job_available():
+                delayed = self.with_delay(
+                    description=_('Batch labels for %d products') % len(product_ids),
+                    channel=QZ_PRINT_CHANNEL,
+                ).print_labels_batch(labels_data)
+                return _notification(
+                    _('Batch Label Print Submitted'),
+                    _('Batch label print for %d products queued (job %s)') % (
+                        len(product_ids), delayed.uuid
+                    ),
+                    'info',
+                )
             
             # Print all labels in a single job
             result = self.print_labels_batch(labels_data)
             
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Batch Label Print Submitted'),
-                    'message': _('Batch label print job %s has been submitted for %d products') % (
-                        result['job_id'], len(self)
-                    ),
-                    'type': 'success',
-                    'sticky': False,
-                }
-            }
+            return _notification(
+                _('Batch Label Print Submitted'),
+                _('Batch label print job %s has been submitted for %d products') % (
+                    result['job_id'], len(product_ids)
+                ),
+            )
+        except UserError:
+            # Already a user-facing message (missing printer, invalid data, ...)
+            raise
         except Exception as e:
-            _logger.error(f'Failed to print batch labels: {str(e)}')
-            raise UserError(_('Failed to print batch labels: %s') % str(e))
+            _logger.error('Failed to print batch labels: %s', e)
+            raise UserError(_('Failed to print batch labels: %s') % e)
 
     @api.model
     def print_product_label(self, product_id, **options):
@@ -111,18 +153,47 @@ class ProductProduct(models.Model):
         Returns:
             dict: Print job information
         """
-        product = self.browse(product_id)
-        if not product.exists():
+        # Lightweight existence check instead of loading the product record
+        self.env.cr.execute('SELECT 1 FROM product_product WHERE id = %s', (product_id,))
+        if not self.env.cr.fetchone():
             raise UserError(_('Product with ID %s not found') % product_id)
         
+        # Pull out the named options first so they are not passed twice
+        printer = options.pop('printer', None)
+        template = options.pop('template', None)
         label_data = {
-            'product_id': product.id,
-            'date': options.get('date'),
+            'product_id': product_id,
+            'date': options.pop('date', None),
         }
         
-        return self.print_label(
-            label_data,
-            printer=options.get('printer'),
-            template=options.get('template'),
-            **options
-        )
+        return self.print_label(label_data, printer=printer, template=template, **options)
+
+    @api.model
+    def print_labels_batch_by_ids(self, product_ids, date=None, printer=None, template=None, **options):
+        """
+        API method to print labels for a list of product IDs in a single job.
+        
+        Preferred over calling print_product_label in a loop: the products are
+        checked with one query and all labels go out as one print job.
+        
+        Args:
+            product_ids (list): Product IDs (duplicates are ignored)
+            date: Optional date printed on every label
+            printer (int|str): Printer ID or name (optional)
+            template (str): Optional custom template
+            **options: Additional print options
+            
+        Returns:
+            dict: Print job information
+        """
+        product_ids = list(dict.fromkeys(product_ids or []))
+        if not product_ids:
+            raise UserError(_('No products selected'))
+        
+        self.env.cr.execute('SELECT id FROM product_product WHERE id = ANY(%s)', (product_ids,))
+        missing = set(product_ids) - {row[0] for row in self.env.cr.fetchall()}
+        if missing:
+            raise UserError(_('Products with IDs %s not found') % ', '.join(map(str, sorted(missing))))
+        
+        labels_data = [{'product_id': product_id, 'date': date} for product_id in product_ids]
+        return self.print_labels_batch(labels_data, printer=printer, template=template, **options)
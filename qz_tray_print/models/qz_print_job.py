@@ -1,11 +1,45 @@
 # -*- coding: utf-8 -*-
 import logging
 import json
-from odoo import models, fields, api, _
+import re
+from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
+from .qz_print_service import QZ_PRINT_CHANNEL, _FORMAT_FIELD
+
 _logger = logging.getLogger(__name__)
 
+# Keywords marking an error as transient (can be retried), matched in one pass
+_TRANSIENT_ERROR_RE = re.compile(
+    r'timeout|connection|network|offline|unavailable|busy', re.IGNORECASE
+)
+
+# Maximum length kept for a job's error history
+_MAX_ERROR_LENGTH = 4096
+
+# Document types that can be combined into a label batch job
+_LABEL_DOCUMENT_TYPES = frozenset(('label', 'barcode', 'product_label'))
+
+# Upper bound for the combined payload of a label batch job
+_BATCH_MAX_BYTES = 16 * 1024 * 1024
+
+# queue_job identity key of a printer's background queue job, by printer ID
+_PRINTER_QUEUE_IDENTITY_KEY = 'qz.print.job._process_printer_queue-%s'
+
+# Job state transitions: {event: ({current state: new state}, timestamp field)}
+# A job whose state has no entry for the event is left unchanged
+_JOB_STATES = ('draft', 'queued', 'printing', 'completed', 'failed', 'cancelled')
+_STATE_TRANSITIONS = {
+    'start': ({'queued': 'printing', 'failed': 'printing'}, None),
+    'retry': ({'failed': 'queued'}, None),
+    'complete': (dict.fromkeys(_JOB_STATES, 'completed'), 'completed_date'),
+    'fail': (dict.fromkeys(_JOB_STATES, 'failed'), None),
+    'cancel': (dict.fromkeys(('draft', 'queued', 'printing', 'failed'), 'cancelled'), 'completed_date'),
+}
+
 
 class QZPrintJob(models.Model):
     _name = 'qz.print.job'
@@ -62,6 +96,7 @@ class QZPrintJob(models.Model):
         required=True,
         default='draft',
         tracking=True,
+        copy=False,
         help='Current status of the print job'
     )
     
@@ -116,6 +151,7 @@ class QZPrintJob(models.Model):
     error_message = fields.Text(
         string='Error Message',
         readonly=True,
+        copy=False,
         help='Error details if job failed'
     )
     
@@ -123,6 +159,7 @@ class QZPrintJob(models.Model):
         string='Retry Count',
         default=0,
         readonly=True,
+        copy=False,
         help='Number of times this job has been retried'
     )
     
@@ -130,12 +167,14 @@ class QZPrintJob(models.Model):
     submitted_date = fields.Datetime(
         string='Submitted Date',
         readonly=True,
+        copy=False,
         help='When the job was submitted'
     )
     
     completed_date = fields.Datetime(
         string='Completed Date',
         readonly=True,
+        copy=False,
         help='When the job was completed or failed'
     )
     
@@ -156,6 +195,27 @@ class QZPrintJob(models.Model):
     create_uid = fields.Many2one('res.users', string='Created By', readonly=True)
     write_uid = fields.Many2one('res.users', string='Last Updated By', readonly=True)
 
+    # SQL constraints
+    _sql_constraints = [
+        ('retry_count_not_negative', 'CHECK(retry_count >= 0)', 'Retry count cannot be negative'),
+    ]
+
+    def _auto_init(self):
+        """
+        Add a partial index matching the queued job selection of
+        process_queued_jobs, so the cron reads each printer's queue
+        in order from a small index instead of scanning the job history.
+        """
+        result = super()._auto_init()
+        tools.create_index(
+            self._cr,
+            'qz_print_job_queued_idx',
+            self._table,
+            ['printer_id', 'submitted_date', 'priority DESC', 'id'],
+            where="state = 'queued'",
+        )
+        return result
+
     @api.model
     def _get_default_name(self):
         """Generate default job name using sequence"""
@@ -164,16 +224,47 @@ class QZPrintJob(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        """Override create to enhance name with document type and printer"""
-        records = super().create(vals_list)
-        for record in records:
-            if record.name and record.name.startswith('PrintJob-'):
-                # Enhance the name with document type and printer
-                printer_name = record.printer_id.name if record.printer_id else 'Unknown'
-                doc_type = record.document_type or 'Document'
-                sequence_part = record.name.split('-')[1]
-                record.name = f'{doc_type}-{printer_name}-{sequence_part}'
-        return records
+        """Override create to name jobs after document type and printer"""
+        # Compute the final name before inserting, so each job is written once
+        printer_ids = {vals['printer_id'] for vals in vals_list if vals.get('printer_id')}
+        printer_names = {
+            printer.id: printer.name
+            for printer in self.env['qz.printer'].browse(printer_ids)
+        }
+        for vals in vals_list:
+            name = vals.get('name')
+            if name and not name.startswith('PrintJob-'):
+                continue
+            if name:
+                sequence_part = name.split('-')[1]
+            else:
+                sequence_part = self.env['ir.sequence'].next_by_code('qz.print.job') or 'New'
+            printer_name = printer_names.get(vals.get('printer_id'), 'Unknown')
+            doc_type = vals.get('document_type') or 'Document'
+            vals['name'] = f'{doc_type}-{printer_name}-{sequence_part}'
+        return super().create(vals_list)
+
+    def write(self, vals):
+        """Override write to push final job states to the submitting user"""
+        result = super().write(vals)
+        if vals.get('state') in ('completed', 'failed', 'cancelled'):
+            self._notify_status()
+        return result
+
+    def _notify_status(self):
+        """
+        Send the job status to the submitting user over the bus
+        
+        Lets the frontend report the outcome of jobs it didn't submit
+        directly, such as receipts printed in the background.
+        """
+        Bus = self.env['bus.bus']
+        for job in self:
+            Bus._sendone(job.user_id.partner_id, 'qz_print_status', {
+                'job_id': job.id,
+                'state': job.state,
+                'error_message': job.error_message or '',
+            })
 
     @api.constrains('copies')
     def _check_copies(self):
@@ -189,13 +280,42 @@ class QZPrintJob(models.Model):
             if record.priority < 0:
                 raise ValidationError(_('Priority cannot be negative'))
 
-    @api.constrains('retry_count')
-    def _check_retry_count(self):
-        """Validate retry count"""
-        for record in self:
-            if record.retry_count < 0:
-                raise ValidationError(_('Retry count cannot be negative'))
 
+    def _can_transition(self, event):
+        """Check whether the job's current state allows the given event"""
+        self.ensure_one()
+        return self.state in _STATE_TRANSITIONS[event][0]
+
+    def _transition(self, event, **values):
+        """
+        Apply a state machine event to the jobs in self
+        
+        Jobs are grouped by target state, so the whole recordset is updated
+        with one write per distinct target state.
+        
+        Args:
+            event: Key of _STATE_TRANSITIONS
+            **values: Extra field values written along with the new state
+            
+        Returns:
+            qz.print.job: The jobs that changed state
+        """
+        targets, timestamp_field = _STATE_TRANSITIONS[event]
+        job_ids_by_state = defaultdict(list)
+        for job in self:
+            new_state = targets.get(job.state)
+            if new_state:
+                job_ids_by_state[new_state].append(job.id)
+        
+        if timestamp_field:
+            values[timestamp_field] = fields.Datetime.now()
+        
+        transitioned = self.browse()
+        for new_state, job_ids in job_ids_by_state.items():
+            jobs = self.browse(job_ids)
+            jobs.write(dict(values, state=new_state))
+            transitioned |= jobs
+        return transitioned
 
     def submit_job(self):
         """
@@ -254,13 +374,13 @@ class QZPrintJob(models.Model):
         self.ensure_one()
         
         # Check if job is in correct state
-        if self.state not in ['queued', 'failed']:
+        if not self._can_transition('start'):
             _logger.warning(f'Cannot process job {self.name} in state {self.state}')
             return False
         
         try:
             # Update state to printing
-            self.write({'state': 'printing'})
+            self._transition('start')
             
             # Validate printer is active
             if not self.printer_id.active:
@@ -269,15 +389,8 @@ class QZPrintJob(models.Model):
                 )
             
             # Check if printer supports the data format
-            format_supported = False
-            if self.data_format == 'pdf' and self.printer_id.supports_pdf:
-                format_supported = True
-            elif self.data_format == 'html' and self.printer_id.supports_html:
-                format_supported = True
-            elif self.data_format == 'escpos' and self.printer_id.supports_escpos:
-                format_supported = True
-            elif self.data_format == 'zpl' and self.printer_id.supports_zpl:
-                format_supported = True
+            field_name = _FORMAT_FIELD.get(self.data_format)
+            format_supported = bool(field_name and self.printer_id[field_name])
             
             if not format_supported:
                 raise ValidationError(
@@ -331,17 +444,7 @@ class QZPrintJob(models.Model):
         Returns:
             bool: True if error is transient, False if permanent
         """
-        transient_keywords = [
-            'timeout',
-            'connection',
-            'network',
-            'offline',
-            'unavailable',
-            'busy'
-        ]
-        
-        error_lower = error_message.lower()
-        return any(keyword in error_lower for keyword in transient_keywords)
+        return bool(_TRANSIENT_ERROR_RE.search(error_message or ''))
 
     def retry_job(self):
         """
@@ -354,15 +457,12 @@ class QZPrintJob(models.Model):
         self.ensure_one()
         
         # Check if job can be retried
-        if self.state != 'failed':
+        if not self._can_transition('retry'):
             _logger.warning(f'Cannot retry job {self.name} in state {self.state}')
             return False
         
         # Get retry configuration
-        IrConfigParameter = self.env['ir.config_parameter'].sudo()
-        retry_enabled = IrConfigParameter.get_param('qz_tray.retry_enabled', default='True') == 'True'
-        max_retries = int(IrConfigParameter.get_param('qz_tray.retry_count', default=3))
-        retry_delay = int(IrConfigParameter.get_param('qz_tray.retry_delay', default=5))
+        retry_enabled, max_retries, retry_delay = self._get_retry_config()
         
         if not retry_enabled:
             _logger.info(f'Retry disabled for job {self.name}')
@@ -375,8 +475,7 @@ class QZPrintJob(models.Model):
             )
             self.write({
                 'completed_date': fields.Datetime.now(),
-                'error_message': self.error_message + '\n' + 
-                                _('Maximum retry count exceeded')
+                'error_message': self._append_error_message(_('Maximum retry count exceeded'))
             })
             # Notify administrator
             self._notify_admin_failure()
@@ -399,16 +498,53 @@ class QZPrintJob(models.Model):
         )
         
         # Reset job state for retry
-        self.write({
-            'state': 'queued',
-            'retry_count': new_retry_count,
-            'error_message': self.error_message + '\n' + 
-                           _('Retry attempt %d at %s') % (new_retry_count, fields.Datetime.now())
-        })
+        self._transition(
+            'retry',
+            retry_count=new_retry_count,
+            error_message=self._append_error_message(
+                _('Retry attempt %d at %s') % (new_retry_count, fields.Datetime.now())
+            ),
+        )
         
         # Process the job
         return self.process_job()
 
+    def _append_error_message(self, line):
+        """
+        Append a line to the job's error history
+        
+        Only the most recent _MAX_ERROR_LENGTH characters are kept, so
+        repeated retries don't grow the row without bound.
+        
+        Args:
+            line: Line to append
+            
+        Returns:
+            str: New error message
+        """
+        message = f'{self.error_message}\n{line}' if self.error_message else line
+        if len(message) > _MAX_ERROR_LENGTH:
+            message = '…' + message[-_MAX_ERROR_LENGTH:]
+        return message
+
+    @api.model
+    def _get_retry_config(self):
+        """
+        Get the retry settings from the system parameters
+        
+        get_param is backed by the registry's ormcache, which is cleared
+        whenever a parameter changes, so repeated calls don't hit the database.
+        
+        Returns:
+            tuple: (retry_enabled, max_retries, retry_delay)
+        """
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        return (
+            IrConfigParameter.get_param('qz_tray.retry_enabled', default='True') == 'True',
+            int(IrConfigParameter.get_param('qz_tray.retry_count', default=3)),
+            int(IrConfigParameter.get_param('qz_tray.retry_delay', default=5)),
+        )
+
     def _notify_admin_failure(self):
         """
         Notify administrator of job failure after max retries
@@ -459,30 +595,28 @@ class QZPrintJob(models.Model):
             self._send_basic_failure_email(admin_users)
             return
         
-        # Send email to each administrator
-        for admin in admin_users:
-            if not admin.email:
-                _logger.warning(f'Administrator {admin.name} has no email address')
-                continue
-            
-            try:
-                # Use the template to send email
-                template.send_mail(
-                    self.id,
-                    force_send=True,
-                    email_values={
-                        'email_to': admin.email,
-                        'recipient_ids': [(4, admin.partner_id.id)],
-                    }
-                )
-                _logger.info(
-                    f'Failure notification sent to {admin.name} ({admin.email}) '
-                    f'for job {self.name}'
-                )
-            except Exception as e:
-                _logger.error(
-                    f'Failed to send email notification to {admin.name}: {str(e)}'
-                )
+        # Send a single email addressed to all administrators
+        admins_with_email = admin_users.filtered('email')
+        for admin in admin_users - admins_with_email:
+            _logger.warning('Administrator %s has no email address', admin.name)
+        if not admins_with_email:
+            return
+        
+        try:
+            # Render the template once for every recipient
+            template.send_mail(
+                self.id,
+                force_send=True,
+                email_values={
+                    'email_to': ','.join(admins_with_email.mapped('email')),
+                },
+            )
+            _logger.info(
+                'Failure notification sent to %d administrator(s) for job %s',
+                len(admins_with_email), self.name
+            )
+        except Exception as e:
+            _logger.error('Failed to send email notification for job %s: %s', self.name, e)
     
     def _send_basic_failure_email(self, admin_users):
         """
@@ -516,26 +650,25 @@ class QZPrintJob(models.Model):
             self.error_message or 'No error message available'
         )
         
-        # Send notification to admins
-        for admin in admin_users:
-            if not admin.email:
-                continue
-            
-            try:
-                self.env['mail.mail'].create({
-                    'subject': subject,
-                    'body_html': body,
-                    'email_to': admin.email,
-                    'auto_delete': True,
-                }).send()
-                
-                _logger.info(
-                    f'Basic failure notification sent to {admin.name} for job {self.name}'
-                )
-            except Exception as e:
-                _logger.error(
-                    f'Failed to send basic email to {admin.name}: {str(e)}'
-                )
+        # Create all notification emails in one batch, sharing the body
+        # rendered above, and send them together
+        vals_list = [{
+            'subject': subject,
+            'body_html': body,
+            'email_to': admin.email,
+            'auto_delete': True,
+        } for admin in admin_users if admin.email]
+        if not vals_list:
+            return
+        
+        try:
+            self.env['mail.mail'].create(vals_list).send()
+            _logger.info(
+                'Basic failure notification sent to %d administrator(s) for job %s',
+                len(vals_list), self.name
+            )
+        except Exception as e:
+            _logger.error('Failed to send basic failure emails for job %s: %s', self.name, e)
 
     def cancel_job(self):
         """
@@ -543,15 +676,10 @@ class QZPrintJob(models.Model):
         """
         self.ensure_one()
         
-        if self.state in ['completed', 'cancelled']:
+        if not self._transition('cancel'):
             _logger.warning(f'Cannot cancel job {self.name} in state {self.state}')
             return False
         
-        self.write({
-            'state': 'cancelled',
-            'completed_date': fields.Datetime.now()
-        })
-        
         _logger.info(f'Print job {self.name} cancelled by user {self.env.user.name}')
         return True
 
@@ -561,11 +689,7 @@ class QZPrintJob(models.Model):
         """
         self.ensure_one()
         
-        self.write({
-            'state': 'completed',
-            'completed_date': fields.Datetime.now(),
-            'error_message': False
-        })
+        self._transition('complete', error_message=False)
         
         _logger.info(f'Print job {self.name} completed successfully')
         return True
@@ -579,10 +703,7 @@ class QZPrintJob(models.Model):
         """
         self.ensure_one()
         
-        self.write({
-            'state': 'failed',
-            'error_message': error_message
-        })
+        self._transition('fail', error_message=error_message)
         
         _logger.error(f'Print job {self.name} failed: {error_message}')
         
@@ -626,42 +747,67 @@ class QZPrintJob(models.Model):
         
         printer = printers[0]
         
-        # Validate all jobs are label type
-        non_label_jobs = label_jobs.filtered(
-            lambda j: j.document_type not in ['label', 'barcode', 'product_label']
-        )
-        if non_label_jobs:
-            _logger.warning(
-                f'Skipping non-label jobs in batch: '
-                f'{", ".join(non_label_jobs.mapped("name"))}'
-            )
-            label_jobs = label_jobs - non_label_jobs
+        # Validate all jobs are label type, splitting them in a single pass
+        label_ids, non_label_names = [], []
+        for job in label_jobs:
+            if job.document_type in _LABEL_DOCUMENT_TYPES:
+                label_ids.append(job.id)
+            else:
+                non_label_names.append(job.name)
+        if non_label_names:
+            _logger.warning('Skipping non-label jobs in batch: %s', ', '.join(non_label_names))
+            label_jobs = self.browse(label_ids).with_prefetch(label_jobs._prefetch_ids)
         
         if not label_jobs:
             raise ValidationError(_('No valid label jobs to batch'))
         
         # Determine the format (all labels should use same format)
-        formats = label_jobs.mapped('data_format')
-        if len(set(formats)) > 1:
+        batch_format = label_jobs[0].data_format
+        if any(job.data_format != batch_format for job in label_jobs[1:]):
             _logger.warning(
-                f'Multiple formats detected in batch: {formats}. '
-                f'Using format of first job.'
+                'Multiple formats detected in batch: %s. Using format of first job.',
+                label_jobs.mapped('data_format')
             )
         
-        batch_format = label_jobs[0].data_format
-        
-        # Combine label data
-        combined_data = b''
-        for job in label_jobs.sorted(key=lambda j: j.submitted_date):
-            if job.data:
-                combined_data += job.data
-                # Add separator between labels if needed
-                if batch_format == 'zpl':
-                    # ZPL labels are typically self-contained
-                    combined_data += b'\n'
-                elif batch_format == 'escpos':
-                    # ESC/POS may need cut command between labels
-                    combined_data += b'\x1D\x56\x00'  # Cut paper command
+        # Separator after each label
+        if batch_format == 'zpl':
+            # ZPL labels are typically self-contained
+            separator = b'\n'
+        elif batch_format == 'escpos':
+            # ESC/POS may need cut command between labels
+            separator = b'\x1D\x56\x00'  # Cut paper command
+        else:
+            separator = b''
+        
+        # Load every label's submission date and attachment data in one
+        # batch, so sorting and joining below only hit the cache
+        label_jobs.read(['submitted_date', 'data'])
+        sorted_jobs = label_jobs.sorted(key=attrgetter('submitted_date'))
+        
+        # Combine label data in one join instead of repeated concatenation,
+        # capping the payload so a huge backlog is not built in memory at once
+        parts = []
+        payload_size = 0
+        deferred_jobs = self.browse()
+        for index, job in enumerate(sorted_jobs):
+            if not job.data:
+                continue
+            if parts and payload_size + len(job.data) > _BATCH_MAX_BYTES:
+                # Leave the remaining labels queued for the next run
+                deferred_jobs = sorted_jobs[index:]
+                break
+            parts.append(job.data)
+            parts.append(separator)
+            payload_size += len(job.data) + len(separator)
+        combined_data = b''.join(parts)
+        del parts
+        
+        if deferred_jobs:
+            _logger.info(
+                'Batch payload limit reached, leaving %d label job(s) queued',
+                len(deferred_jobs)
+            )
+            label_jobs = label_jobs - deferred_jobs
         
         # Create batch job
         batch_job = self.create({
@@ -691,6 +837,48 @@ class QZPrintJob(models.Model):
         
         return batch_job
 
+    @api.model
+    def _select_dispatchable_job_ids(self, printer_ids, exclude_busy=False, claim=False):
+        """
+        Select queued job IDs for the given printers in dispatch order
+        
+        Jobs are ordered per printer by submitted_date (oldest first), then
+        priority (highest first), matching the queued job index.
+        
+        With claim=True the selected rows are locked until the end of the
+        transaction, and rows already locked by another worker are skipped,
+        so concurrent cron runs or background jobs never process the same job.
+        
+        Args:
+            printer_ids: List of qz.printer IDs
+            exclude_busy: Skip printers that already have a job printing
+            claim: Lock the selected jobs for this transaction
+            
+        Returns:
+            list: Job IDs
+        """
+        if not printer_ids:
+            return []
+        
+        # Pending ORM writes (e.g. jobs just submitted) must reach the table
+        self.flush_model(['printer_id', 'state', 'submitted_date', 'priority'])
+        
+        # NOT EXISTS lets the planner use an anti-join on the busy printers
+        busy_filter = """
+            AND NOT EXISTS (
+                SELECT 1 FROM qz_print_job k
+                WHERE k.printer_id = j.printer_id AND k.state = 'printing'
+            )
+        """ if exclude_busy else ''
+        self.env.cr.execute(f"""
+            SELECT j.id FROM qz_print_job j
+            WHERE j.state = 'queued' AND j.printer_id = ANY(%s)
+            {busy_filter}
+            ORDER BY j.printer_id, j.submitted_date, j.priority DESC, j.id
+            {'FOR UPDATE OF j SKIP LOCKED' if claim else ''}
+        """, (list(printer_ids),))
+        return [row[0] for row in self.env.cr.fetchall()]
+
     @api.model
     def process_queued_jobs(self):
         """
@@ -717,77 +905,65 @@ class QZPrintJob(models.Model):
                 'message': 'No active printers available'
             }
         
+        # Load the printer fields process_job checks in one query, instead
+        # of one per printer the first time a job reads them
+        active_printers.read([
+            'name', 'active', 'printer_type',
+            'supports_pdf', 'supports_html', 'supports_escpos', 'supports_zpl',
+        ])
+        
+        # With queue_job, each printer's queue is handed to its own background
+        # job so independent printers are processed in parallel. queue_job's
+        # queue_job__no_delay context key processes the queues inline instead.
+        dispatch = (
+            self.env['qz.print.service']._queue_job_available()
+            and not self.env.context.get('queue_job__no_delay')
+        )
+        
+        # Get queued jobs for all active printers at once, in FIFO order per
+        # printer: submitted_date (oldest first), then priority (highest first).
+        # Jobs processed here are claimed so a concurrent run skips them.
+        all_queued_jobs = self.browse(self._select_dispatchable_job_ids(
+            active_printers.ids, claim=not dispatch
+        ))
+        jobs_by_printer = {
+            printer_id: self.browse([job.id for job in jobs]).with_prefetch(all_queued_jobs._prefetch_ids)
+            for printer_id, jobs in groupby(all_queued_jobs, key=lambda job: job.printer_id.id)
+        }
+        
+        if dispatch:
+            dispatched = active_printers.filtered(lambda printer: printer.id in jobs_by_printer)
+            for printer in dispatched:
+                # The identity key keeps at most one pending queue job per
+                # printer when the cron runs before the previous one started
+                self.with_delay(
+                    description=f'Print queue {printer.name}',
+                    channel=QZ_PRINT_CHANNEL,
+                    identity_key=_PRINTER_QUEUE_IDENTITY_KEY % printer.id,
+                )._process_printer_queue(printer.id)
+            
+            result_message = f'Dispatched queues of {len(dispatched)} printer(s) to background jobs'
+            _logger.info('Completed queued job processing: %s', result_message)
+            return {
+                'processed': 0,
+                'failed': 0,
+                'dispatched': len(dispatched),
+                'printers': len(active_printers),
+                'message': result_message
+            }
+        
         processed_count = 0
         failed_count = 0
         
         # Process jobs for each active printer
         for printer in active_printers:
-            # Get queued jobs for this printer in FIFO order (oldest first)
-            # Order by submitted_date (oldest first), then by priority (highest first)
-            queued_jobs = self.search([
-                ('printer_id', '=', printer.id),
-                ('state', '=', 'queued')
-            ], order='submitted_date asc, priority desc, id asc')
-            
+            queued_jobs = jobs_by_printer.get(printer.id)
             if not queued_jobs:
                 continue
             
-            _logger.info(
-                f'Processing {len(queued_jobs)} queued job(s) for printer {printer.name}'
-            )
-            
-            # Check if printer is a label printer and if there are multiple label jobs
-            # that can be batched together
-            if printer.printer_type == 'label':
-                label_jobs = queued_jobs.filtered(
-                    lambda j: j.document_type in ['label', 'barcode', 'product_label']
-                )
-                
-                # Batch labels if there are multiple label jobs
-                if len(label_jobs) > 1:
-                    try:
-                        batch_job = self.batch_label_jobs(label_jobs)
-                        # Add batch job to processing queue
-                        queued_jobs = (queued_jobs - label_jobs) | batch_job
-                        _logger.info(
-                            f'Batched {len(label_jobs)} label jobs into {batch_job.name}'
-                        )
-                    except Exception as e:
-                        _logger.error(f'Error batching label jobs: {str(e)}')
-                        # Continue with individual processing if batching fails
-            
-            # Process each job
-            for job in queued_jobs:
-                try:
-                    # Check if printer is still active before processing
-                    if not job.printer_id.active:
-                        _logger.warning(
-                            f'Printer {job.printer_id.name} became inactive, '
-                            f'skipping job {job.name}'
-                        )
-                        continue
-                    
-                    # Process the job
-                    success = job.process_job()
-                    
-                    if success:
-                        processed_count += 1
-                        _logger.info(f'Successfully processed job {job.name}')
-                    else:
-                        failed_count += 1
-                        _logger.warning(f'Failed to process job {job.name}')
-                        
-                except Exception as e:
-                    failed_count += 1
-                    error_msg = f'Error processing job {job.name}: {str(e)}'
-                    _logger.error(error_msg)
-                    
-                    # Mark job as failed
-                    job.write({
-                        'state': 'failed',
-                        'error_message': error_msg,
-                        'completed_date': fields.Datetime.now()
-                    })
+            counts = self._process_printer_queue(printer.id, queued_jobs=queued_jobs)
+            processed_count += counts['processed']
+            failed_count += counts['failed']
         
         result_message = (
             f'Processed {processed_count} job(s), '
@@ -803,3 +979,92 @@ class QZPrintJob(models.Model):
             'message': result_message
         }
 
+    @api.model
+    def _process_printer_queue(self, printer_id, queued_jobs=None):
+        """
+        Process the queued print jobs of a single printer in FIFO order
+        
+        Runs inline from process_queued_jobs, or as its own background job
+        when queue_job is installed.
+        
+        Args:
+            printer_id: ID of the qz.printer whose queue is processed
+            queued_jobs: Queued jobs of that printer in processing order
+                (selected from the database when not given)
+            
+        Returns:
+            dict: Number of processed and failed jobs
+        """
+        printer = self.env['qz.printer'].browse(printer_id)
+        if queued_jobs is None:
+            queued_jobs = self.browse(self._select_dispatchable_job_ids([printer_id], claim=True))
+        
+        processed_count = 0
+        failed_count = 0
+        failed_job_ids = defaultdict(list)
+        
+        if not queued_jobs:
+            return {'processed': processed_count, 'failed': failed_count}
+        
+        _logger.info(
+            f'Processing {len(queued_jobs)} queued job(s) for printer {printer.name}'
+        )
+        
+        # Check if printer is a label printer and if there are multiple label jobs
+        # that can be batched together
+        if printer.printer_type == 'label':
+            label_jobs = queued_jobs.filtered(
+                lambda j: j.document_type in _LABEL_DOCUMENT_TYPES
+            )
+            
+            # Batch labels if there are multiple label jobs
+            if len(label_jobs) > 1:
+                try:
+                    batch_job = self.batch_label_jobs(label_jobs)
+                    # Add batch job to processing queue
+                    queued_jobs = (queued_jobs - label_jobs) | batch_job
+                    _logger.info(
+                        f'Batched {len(label_jobs)} label jobs into {batch_job.name}'
+                    )
+                except Exception as e:
+                    _logger.error(f'Error batching label jobs: {str(e)}')
+                    # Continue with individual processing if batching fails
+        
+        # Process each job
+        for job in queued_jobs:
+            try:
+                # Check if printer is still active before processing
+                if not job.printer_id.active:
+                    _logger.warning(
+                        f'Printer {job.printer_id.name} became inactive, '
+                        f'skipping job {job.name}'
+                    )
+                    continue
+                
+                # Process the job
+                success = job.process_job()
+                
+                if success:
+                    processed_count += 1
+                    _logger.info(f'Successfully processed job {job.name}')
+                else:
+                    failed_count += 1
+                    _logger.warning(f'Failed to process job {job.name}')
+                    
+            except Exception as e:
+                failed_count += 1
+                _logger.error('Error processing job %s: %s', job.name, e)
+                
+                # Mark job as failed after the loop, grouped by error
+                failed_job_ids[_('Error processing job: %s') % e].append(job.id)
+        
+        # Mark failed jobs with one write per distinct error
+        now = fields.Datetime.now()
+        for error_msg, job_ids in failed_job_ids.items():
+            self.browse(job_ids).write({
+                'state': 'failed',
+                'error_message': error_msg,
+                'completed_date': now
+            })
+        
+        return {'processed': processed_count, 'failed': failed_count}
@@ -1,11 +1,138 @@
 # -*- coding: utf-8 -*-
+import functools
+import hashlib
 import logging
 import base64
-from odoo import models, api, fields, _
+from collections import OrderedDict
+from odoo import models, api, fields, tools, _
 from odoo.exceptions import UserError, ValidationError
 
 _logger = logging.getLogger(__name__)
 
+# queue_job channel used for deferred print jobs (OCA queue_job, optional)
+QZ_PRINT_CHANNEL = 'root.qz_print'
+
+# 1x1 transparent PNG returned until real barcode generation is implemented
+_BARCODE_PLACEHOLDER_URI = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+
+# Formats accepted by print_raw, in the order listed in error messages
+_VALID_RAW_FORMATS_ORDER = ('pdf', 'html', 'escpos', 'zpl')
+_VALID_RAW_FORMATS = frozenset(_VALID_RAW_FORMATS_ORDER)
+_VALID_RAW_FORMATS_MSG = ', '.join(_VALID_RAW_FORMATS_ORDER)
+
+# Printer capability field for each print data format
+_FORMAT_FIELD = {
+    'pdf': 'supports_pdf',
+    'html': 'supports_html',
+    'escpos': 'supports_escpos',
+    'zpl': 'supports_zpl',
+}
+
+# Label formats in order of preference; ZPL is the most efficient for
+# label printers
+_LABEL_FORMAT_PRIORITY = ('zpl', 'escpos', 'html', 'pdf')
+
+# Label formats rendered to raw printer commands rather than HTML
+_RAW_LABEL_FORMATS = frozenset(('zpl', 'escpos'))
+
+# Separator written between raw labels in a batch
+_RAW_LABEL_SEPARATORS = {
+    'zpl': b'\n',  # ZPL labels can be concatenated directly
+    'escpos': b'\n\x1d\x56\x00\n',  # ESC/POS needs a cut between labels (GS V 0 = full cut)
+}
+
+# ZPL label header: start format (^XA), print width and label length
+_ZPL_HEADER = '^XA\n^PW{width_dots}\n^LL{height_dots}'
+
+# ZPL blocks for product labels, as (product field, block) pairs; each block
+# sets the field origin and font (or barcode setup) and the field data
+_ZPL_PRODUCT_BLOCKS = (
+    ('name', '^FO50,50\n^A0N,40,40\n^FD{}^FS'),
+    ('default_code', '^FO50,100\n^A0N,30,30\n^FDCode: {}^FS'),
+    ('list_price', '^FO50,150\n^A0N,35,35\n^FDPrice: ${:.2f}^FS'),
+    ('barcode', '^FO50,200\n^BY3\n^BC,100,Y,N,N\n^FD{}^FS'),  # Code128, bar width 3
+)
+
+# ZPL block for a standalone barcode label (Code128)
+_ZPL_BARCODE_BLOCK = '^FO50,100\n^BY3\n^BC,100,Y,N,N\n^FD{}^FS'
+
+# ESC/POS command sequences used by the built-in label generator
+_ESCPOS_INIT = b'\x1b@'  # ESC @
+_ESCPOS_ALIGN_CENTER = b'\x1ba\x01'  # ESC a 1
+_ESCPOS_DOUBLE_SIZE = b'\x1b!\x30'  # ESC ! 0x30
+_ESCPOS_DOUBLE_HEIGHT = b'\x1b!\x20'  # ESC ! 0x20
+_ESCPOS_NORMAL_SIZE = b'\x1b!\x00'  # ESC ! 0
+_ESCPOS_BARCODE_CODE128 = b'\x1dk\x49'  # GS k 73
+_ESCPOS_FULL_CUT = b'\x1dV\x00'  # GS V 0
+
+# Receipt line fields and their defaults, as (field, default) pairs
+_LINE_FIELDS = (
+    ('name', ''),
+    ('quantity', 1),
+    ('price_unit', 0.0),
+    ('price_subtotal', 0.0),
+    ('discount', 0.0),
+)
+
+# Receipt formatting options: (context key, option name, default)
+_RECEIPT_OPTIONS = (
+    ('receipt_width', 'width', 80),  # Receipt width in mm
+    ('font_size', 'font_size', 'normal'),
+    ('show_logo', 'show_logo', True),
+    ('show_barcode', 'show_barcode', False),
+)
+
+# Label formatting options: (context key, option name, default)
+_LABEL_OPTIONS = (
+    ('label_width', 'width', 4),  # Label width in inches
+    ('label_height', 'height', 6),  # Label height in inches
+    ('rotation', 'rotation', 0),  # Rotation in degrees
+    ('dpi', 'dpi', 203),
+)
+
+# Receipt totals: (output key, receipt_data key)
+_TOTAL_FIELDS = (
+    ('subtotal', 'amount_untaxed'),
+    ('tax', 'amount_tax'),
+    ('total', 'amount_total'),
+    ('discount', 'amount_discount'),
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _zpl_header(width_dots, height_dots):
+    """ZPL label header for a label size, memoized per printer/label profile"""
+    return _ZPL_HEADER.format(width_dots=width_dots, height_dots=height_dots)
+
+
+def _escpos_barcode(value):
+    """ESC/POS CODE128 barcode command (GS k 73 n data) for a barcode value"""
+    try:
+        data = str(value).encode('ascii')
+    except UnicodeEncodeError:
+        raise UserError(_('Barcode "%s" must contain only ASCII characters') % value)
+    if len(data) > 255:
+        raise UserError(_('Barcode "%s" is too long (maximum 255 characters)') % value)
+    return _ESCPOS_BARCODE_CODE128 + bytes((len(data),)) + data
+
+
+# Data URIs of reused images (logos): {(image digest, mime_type): data_uri}
+# Keyed on a digest so the cache holds no image bytes
+_IMAGE_DATA_URI_CACHE = OrderedDict()
+_IMAGE_DATA_URI_CACHE_SIZE = 32
+
+
+def _image_data_uri(image_data, mime_type):
+    """Base64 data URI for binary image data, memoized for reused images (logos)"""
+    key = (hashlib.blake2b(image_data, digest_size=16).digest(), mime_type)
+    data_uri = _IMAGE_DATA_URI_CACHE.pop(key, None)
+    if data_uri is None:
+        data_uri = 'data:%s;base64,%s' % (mime_type, base64.b64encode(image_data).decode('ascii'))
+    _IMAGE_DATA_URI_CACHE[key] = data_uri
+    if len(_IMAGE_DATA_URI_CACHE) > _IMAGE_DATA_URI_CACHE_SIZE:
+        _IMAGE_DATA_URI_CACHE.popitem(last=False)
+    return data_uri
+
 
 class QZPrintService(models.AbstractModel):
     """
@@ -33,19 +160,19 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 3.1, 3.2
         """
-        _logger.info(f'print_document called with template={template}, printer={printer}')
+        _logger.info('print_document called with template=%s, printer=%s', template, printer)
         
         # Validate template exists
         try:
-            template_view = self.env.ref(template)
+            template_id = self._resolve_template(template)
         except ValueError:
             raise ValidationError(_('Template "%s" not found') % template)
         
         # Render the template with provided data
         try:
-            rendered_html = self._render_template(template, data)
+            rendered_html = self._render_template(template, data, template_id=template_id)
         except Exception as e:
-            _logger.error(f'Template rendering failed: {str(e)}')
+            _logger.error('Template rendering failed: %s', e)
             raise UserError(_('Failed to render template: %s') % str(e))
         
         # Get the appropriate printer
@@ -59,7 +186,7 @@ class QZPrintService(models.AbstractModel):
             printer_record=printer_record,
             data=rendered_html.encode('utf-8'),
             data_format='html',
-            template_id=template_view.id,
+            template_id=template_id,
             template_data=data,
             **options
         )
@@ -77,7 +204,7 @@ class QZPrintService(models.AbstractModel):
         Print raw data in a specific format.
         
         Args:
-            data (bytes|str): Raw print data
+            data (bytes|bytearray|memoryview|str): Raw print data
             format (str): Data format ('pdf', 'html', 'escpos', 'zpl')
             printer (int|str): Printer ID or name (optional)
             **options: Additional print options
@@ -87,16 +214,15 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 3.1, 3.3
         """
-        _logger.info(f'print_raw called with format={format}, printer={printer}')
+        _logger.info('print_raw called with format=%s, printer=%s', format, printer)
         
         # Validate format
-        valid_formats = ['pdf', 'html', 'escpos', 'zpl']
-        if format not in valid_formats:
+        if format not in _VALID_RAW_FORMATS:
             raise ValidationError(
-                _('Invalid format "%s". Must be one of: %s') % (format, ', '.join(valid_formats))
+                _('Invalid format "%s". Must be one of: %s') % (format, _VALID_RAW_FORMATS_MSG)
             )
         
-        # Convert data to bytes if needed
+        # Convert text to bytes; bytes-like data is passed through uncopied
         if isinstance(data, str):
             data = data.encode('utf-8')
         
@@ -142,9 +268,7 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 3.1, 3.3
         """
-        _logger.info(f'print_pdf called with printer={printer}')
-        
-        # Validate PDF data
+        # Validate PDF data; print_raw does the logging and format checks
         if not pdf_data:
             raise ValidationError(_('PDF data cannot be empty'))
         
@@ -165,19 +289,19 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 11.1
         """
-        _logger.info(f'preview_document called with template={template}')
+        _logger.info('preview_document called with template=%s', template)
         
         # Validate template exists
         try:
-            self.env.ref(template)
+            template_id = self._resolve_template(template)
         except ValueError:
             raise ValidationError(_('Template "%s" not found') % template)
         
         # Render the template
         try:
-            rendered_html = self._render_template(template, data)
+            rendered_html = self._render_template(template, data, template_id=template_id)
         except Exception as e:
-            _logger.error(f'Template rendering failed: {str(e)}')
+            _logger.error('Template rendering failed: %s', e)
             raise UserError(_('Failed to render template: %s') % str(e))
         
         return {
@@ -202,19 +326,19 @@ class QZPrintService(models.AbstractModel):
         Validates: Requirements 3.4, 3.5, 4.1, 4.2, 4.3, 4.4
         """
         _logger.info(
-            f'get_printer_for_type called with type={document_type}, '
-            f'location={location}, department={department}'
+            'get_printer_for_type called with type=%s, location=%s, department=%s',
+            document_type, location, department
         )
         
-        # Use the printer model's selection algorithm
+        # Use the printer model's selection algorithm (cached per company)
         QZPrinter = self.env['qz.printer']
-        printer = QZPrinter.get_default_printer(
+        printer_id = QZPrinter._default_printer_id(
             printer_type=document_type,
             location_id=location,
             department=department
         )
         
-        return printer
+        return QZPrinter.browse(printer_id) if printer_id else False
 
     @api.model
     def format_receipt(self, receipt_data, template=None, **options):
@@ -237,7 +361,7 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 5.2
         """
-        _logger.info(f'format_receipt called with template={template}')
+        _logger.info('format_receipt called with template=%s', template)
         
         # Validate receipt data
         if not receipt_data:
@@ -256,33 +380,19 @@ class QZPrintService(models.AbstractModel):
         }
         
         # Add receipt-specific formatting options
-        format_context.update({
-            'receipt_width': options.get('width', 80),  # Default 80mm receipt width
-            'font_size': options.get('font_size', 'normal'),
-            'show_logo': options.get('show_logo', True),
-            'show_barcode': options.get('show_barcode', False),
-        })
+        for key, option, default in _RECEIPT_OPTIONS:
+            format_context[key] = options.get(option, default)
         
         # Format line items with proper alignment
         if 'lines' in receipt_data:
-            formatted_lines = []
-            for line in receipt_data['lines']:
-                formatted_line = {
-                    'name': line.get('name', ''),
-                    'quantity': line.get('quantity', 1),
-                    'price_unit': line.get('price_unit', 0.0),
-                    'price_subtotal': line.get('price_subtotal', 0.0),
-                    'discount': line.get('discount', 0.0),
-                }
-                formatted_lines.append(formatted_line)
-            format_context['formatted_lines'] = formatted_lines
+            format_context['formatted_lines'] = [
+                {field: line.get(field, default) for field, default in _LINE_FIELDS}
+                for line in receipt_data['lines']
+            ]
         
         # Format totals
         format_context['totals'] = {
-            'subtotal': receipt_data.get('amount_untaxed', 0.0),
-            'tax': receipt_data.get('amount_tax', 0.0),
-            'total': receipt_data.get('amount_total', 0.0),
-            'discount': receipt_data.get('amount_discount', 0.0),
+            key: receipt_data.get(source, 0.0) for key, source in _TOTAL_FIELDS
         }
         
         # Format payment information
@@ -324,7 +434,7 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 5.2, 5.3
         """
-        _logger.info(f'print_receipt called with printer={printer}')
+        _logger.info('print_receipt called with printer=%s', printer)
         
         # Format the receipt
         formatted = self.format_receipt(receipt_data, template=template, **options)
@@ -340,8 +450,9 @@ class QZPrintService(models.AbstractModel):
                 department=options.get('department')
             )
             if receipt_printer:
-                printer = receipt_printer.id
-                _logger.info(f'Using receipt printer: {receipt_printer.name}')
+                # Hand the record on so print_document does not look it up again
+                printer = receipt_printer
+                _logger.info('Using receipt printer: %s', receipt_printer.name)
         
         # Print using the formatted template
         return self.print_document(
@@ -352,7 +463,8 @@ class QZPrintService(models.AbstractModel):
         )
 
     @api.model
-    def format_label(self, label_data, printer=None, template=None, **options):
+    def format_label(self, label_data, printer=None, template=None, preloaded_products=None,
+                     printer_record=None, shared_context=None, **options):
         """
         Format label data for printing.
         
@@ -366,6 +478,12 @@ class QZPrintService(models.AbstractModel):
             label_data (dict): Label data including product info, barcode, etc.
             printer (int|str): Printer ID or name (optional, used for format detection)
             template (str): Optional custom template
+            preloaded_products (dict): Product values by ID, as built by
+                _get_label_product_values (optional, skips the product lookup)
+            printer_record (qz.printer): Already resolved label printer
+                (optional, skips the printer lookup)
+            shared_context (dict): company, user and default date shared by
+                a batch of labels (optional, read from the environment)
             **options: Additional formatting options (width, height, rotation, etc.)
             
         Returns:
@@ -373,59 +491,42 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 6.2, 6.3
         """
-        _logger.info(f'format_label called with printer={printer}, template={template}')
+        _logger.info('format_label called with printer=%s, template=%s', printer, template)
         
         # Validate label data
         if not label_data:
             raise ValidationError(_('Label data cannot be empty'))
         
         # Get printer record to detect format
-        printer_record = None
-        if printer:
-            printer_record = self._get_printer(printer, document_type='label')
-        else:
-            # Try to get default label printer
-            printer_record = self.get_printer_for_type(
-                'label',
-                location=options.get('location'),
-                department=options.get('department')
-            )
-        
         if not printer_record:
-            raise UserError(_('No label printer available. Please configure a label printer.'))
+            printer_record = self._get_label_printer(printer, **options)
         
         # Detect printer format based on printer capabilities
         label_format = self._detect_label_format(printer_record)
-        _logger.info(f'Detected label format: {label_format} for printer {printer_record.name}')
+        _logger.info('Detected label format: %s for printer %s', label_format, printer_record.name)
         
         # Prepare label formatting context
+        if shared_context is None:
+            shared_context = self._get_label_shared_context()
         format_context = {
             'label': label_data,
-            'company': self.env.company,
-            'user': self.env.user,
-            'date': label_data.get('date', fields.Datetime.now()),
+            'company': shared_context['company'],
+            'user': shared_context['user'],
+            'date': label_data.get('date', shared_context['date']),
             'format': label_format,
         }
         
         # Add label-specific formatting options
-        format_context.update({
-            'label_width': options.get('width', 4),  # Default 4 inches
-            'label_height': options.get('height', 6),  # Default 6 inches
-            'rotation': options.get('rotation', 0),  # Rotation in degrees
-            'dpi': options.get('dpi', 203),  # Default 203 DPI
-        })
+        for key, option, default in _LABEL_OPTIONS:
+            format_context[key] = options.get(option, default)
         
         # Format product information if present
         if 'product_id' in label_data:
-            product = self.env['product.product'].browse(label_data['product_id'])
-            if product.exists():
-                format_context['product'] = {
-                    'name': product.name,
-                    'default_code': product.default_code or '',
-                    'barcode': product.barcode or '',
-                    'list_price': product.list_price,
-                    'uom': product.uom_id.name if product.uom_id else '',
-                }
+            if preloaded_products is None:
+                preloaded_products = self._get_label_product_values([label_data['product_id']])
+            product_values = preloaded_products.get(label_data['product_id'])
+            if product_values:
+                format_context['product'] = product_values
         
         # Generate barcode if needed
         if 'barcode' in label_data or (format_context.get('product') and format_context['product'].get('barcode')):
@@ -471,7 +572,7 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 6.1, 6.2, 6.3
         """
-        _logger.info(f'print_label called with printer={printer}')
+        _logger.info('print_label called with printer=%s', printer)
         
         # Format the label
         formatted = self.format_label(label_data, printer=printer, template=template, **options)
@@ -486,37 +587,15 @@ class QZPrintService(models.AbstractModel):
         # Determine if we need to use raw printing or template printing
         label_format = formatted['format']
         
-        if label_format in ['zpl', 'escpos']:
-            # For ZPL and ESC/POS, we need to render the template first
-            # then send as raw data
-            try:
-                rendered = self._render_template(formatted['template'], formatted['data'])
-                
-                # Print as raw data
-                return self.print_raw(
-                    data=rendered,
-                    format=label_format,
-                    printer=printer,
-                    **options
-                )
-            except ValueError:
-                # Template not found, might be generating raw data directly
-                _logger.warning(f'Template {formatted["template"]} not found, attempting direct raw print')
-                
-                # Generate raw label data directly
-                if label_format == 'zpl':
-                    raw_data = self._generate_zpl_label(formatted['data'])
-                elif label_format == 'escpos':
-                    raw_data = self._generate_escpos_label(formatted['data'])
-                else:
-                    raise UserError(_('Cannot generate raw label data for format: %s') % label_format)
-                
-                return self.print_raw(
-                    data=raw_data,
-                    format=label_format,
-                    printer=printer,
-                    **options
-                )
+        if label_format in _RAW_LABEL_FORMATS:
+            # For ZPL and ESC/POS, render the template (or generate the
+            # commands directly if it does not exist) and send as raw data
+            return self.print_raw(
+                data=self._render_raw_label(formatted, label_format),
+                format=label_format,
+                printer=printer,
+                **options
+            )
         else:
             # For HTML/PDF, use standard document printing
             return self.print_document(
@@ -544,63 +623,79 @@ class QZPrintService(models.AbstractModel):
             
         Validates: Requirements 6.4
         """
-        _logger.info(f'print_labels_batch called with {len(labels_data)} labels, printer={printer}')
+        _logger.info('print_labels_batch called with %s labels, printer=%s', len(labels_data), printer)
         
         if not labels_data:
             raise ValidationError(_('Labels data cannot be empty'))
         
-        # Format all labels
-        formatted_labels = []
-        label_format = None
-        printer_id = None
+        # Fetch the product values for every label up front, instead of
+        # one existence check and read per label in format_label
+        preloaded_products = self._get_label_product_values(
+            [label['product_id'] for label in labels_data if label.get('product_id')]
+        )
         
-        for label_data in labels_data:
-            formatted = self.format_label(label_data, printer=printer, template=template, **options)
-            formatted_labels.append(formatted)
-            
-            # Use format and printer from first label
-            if label_format is None:
-                label_format = formatted['format']
-                printer_id = formatted.get('printer_id')
+        # Resolve the label printer and the environment values once for
+        # the whole batch
+        printer_record = self._get_label_printer(printer, **options)
+        shared_context = self._get_label_shared_context()
         
-        # Combine all labels into single output
-        if label_format in ['zpl', 'escpos']:
-            # Combine raw label data
-            combined_data = []
+        # Format and render all labels in a single pass, writing raw labels
+        # straight into one byte buffer
+        raw_buffer = bytearray()
+        label_contexts = []
+        label_format = None
+        raw_template_id = None
+        # Encoded raw labels by label data, so repeated labels (reprints,
+        # multipacks) are formatted and rendered only once per batch
+        raw_label_cache = {}
+        
+        for index, label_data in enumerate(labels_data):
+            cache_key = repr(sorted(label_data.items()))
+            if cache_key in raw_label_cache:
+                raw_buffer += _RAW_LABEL_SEPARATORS[label_format]
+                raw_buffer += raw_label_cache[cache_key]
+                continue
             
-            for formatted in formatted_labels:
-                try:
-                    rendered = self._render_template(formatted['template'], formatted['data'])
-                    combined_data.append(rendered)
-                except ValueError:
-                    # Generate raw data directly
-                    if label_format == 'zpl':
-                        raw_data = self._generate_zpl_label(formatted['data'])
-                    elif label_format == 'escpos':
-                        raw_data = self._generate_escpos_label(formatted['data'])
-                    else:
-                        raise UserError(_('Cannot generate raw label data'))
-                    combined_data.append(raw_data)
+            formatted = self.format_label(
+                label_data,
+                printer=printer,
+                template=template,
+                preloaded_products=preloaded_products,
+                printer_record=printer_record,
+                shared_context=shared_context,
+                **options
+            )
             
-            # Join all labels with appropriate separator
-            if label_format == 'zpl':
-                # ZPL labels can be concatenated directly
-                combined = '\n'.join(combined_data)
-            elif label_format == 'escpos':
-                # ESC/POS labels need cut command between them
-                combined = '\n\x1d\x56\x00\n'.join(combined_data)  # GS V 0 = full cut
+            # Use format from first label, and look up its raw template once
+            # rather than probing for it on every label
+            if label_format is None:
+                label_format = formatted['format']
+                if label_format in _RAW_LABEL_FORMATS:
+                    raw_template_id = self._find_raw_label_template(formatted['template'])
             
-            # Print as single raw job
+            if label_format in _RAW_LABEL_FORMATS:
+                rendered = self._render_raw_label(formatted, label_format, template_id=raw_template_id)
+                if isinstance(rendered, str):
+                    rendered = rendered.encode('utf-8')
+                raw_label_cache[cache_key] = rendered
+                if index:
+                    raw_buffer += _RAW_LABEL_SEPARATORS[label_format]
+                raw_buffer += rendered
+            else:
+                label_contexts.append(formatted['data'])
+        
+        if label_format in _RAW_LABEL_FORMATS:
+            # Print as single raw job; the buffer is base64-encoded as is
             return self.print_raw(
-                data=combined,
+                data=raw_buffer,
                 format=label_format,
-                printer=printer or printer_id,
+                printer=printer_record,
                 **options
             )
         else:
             # For HTML/PDF, combine into single template
             combined_context = {
-                'labels': [f['data'] for f in formatted_labels],
+                'labels': label_contexts,
                 'company': self.env.company,
             }
             
@@ -610,13 +705,155 @@ class QZPrintService(models.AbstractModel):
             return self.print_document(
                 template=batch_template,
                 data=combined_context,
-                printer=printer or printer_id,
+                printer=printer_record,
                 **options
             )
 
     # Private helper methods
 
-    def _render_template(self, template, data):
+    def _get_label_printer(self, printer=None, **options):
+        """
+        Resolve the printer to use for labels.
+        
+        Args:
+            printer (int|str|None): Printer ID or name (optional, falls back
+                to the default label printer)
+            **options: Print options (location and department are used)
+            
+        Returns:
+            qz.printer: Label printer record
+            
+        Raises:
+            UserError: If no label printer is available
+        """
+        if printer:
+            printer_record = self._get_printer(printer, document_type='label')
+        else:
+            # Try to get default label printer
+            printer_record = self.get_printer_for_type(
+                'label',
+                location=options.get('location'),
+                department=options.get('department')
+            )
+        
+        if not printer_record:
+            raise UserError(_('No label printer available. Please configure a label printer.'))
+        return printer_record
+
+    def _get_label_product_values(self, product_ids):
+        """
+        Read the product values used on labels for a set of products.
+        
+        Args:
+            product_ids (list): Product IDs (duplicates and missing IDs are fine)
+            
+        Returns:
+            dict: Product values by ID, for the products that exist
+        """
+        products = self.env['product.product'].browse(set(product_ids)).exists()
+        if not products:
+            return {}
+        products.read(['name', 'default_code', 'barcode', 'list_price', 'uom_id'])
+        return {
+            product.id: {
+                'name': product.name,
+                'default_code': product.default_code or '',
+                'barcode': product.barcode or '',
+                'list_price': product.list_price,
+                'uom': product.uom_id.name if product.uom_id else '',
+            }
+            for product in products
+        }
+
+    def _get_label_shared_context(self):
+        """
+        Get the label context values that do not depend on the label.
+        
+        Returns:
+            dict: company, user and the default label date (now)
+        """
+        return {
+            'company': self.env.company,
+            'user': self.env.user,
+            'date': fields.Datetime.now(),
+        }
+
+    def _find_raw_label_template(self, template):
+        """
+        Look up a ZPL/ESC/POS label template without raising.
+        
+        Args:
+            template (str): Template reference
+            
+        Returns:
+            int: Template view ID, or False if the template does not exist
+        """
+        template_view = self.env.ref(template, raise_if_not_found=False)
+        if not template_view:
+            _logger.warning('Template %s not found, generating raw label data directly', template)
+            return False
+        return template_view.id
+
+    def _render_raw_label(self, formatted, label_format, template_id=None):
+        """
+        Render a formatted ZPL/ESC/POS label to raw printer data.
+        
+        Args:
+            formatted (dict): Result of format_label
+            label_format (str): Raw format ('zpl' or 'escpos')
+            template_id (int): Result of _find_raw_label_template for the
+                label's template (optional, looked up when omitted)
+            
+        Returns:
+            str|bytes: Raw label data (bytes from the ESC/POS generator)
+        """
+        if template_id is None:
+            template_id = self._find_raw_label_template(formatted['template'])
+        if template_id:
+            return self._render_template(formatted['template'], formatted['data'], template_id=template_id)
+        
+        # Template not found, generate raw data directly
+        if label_format == 'zpl':
+            return self._generate_zpl_label(formatted['data'])
+        elif label_format == 'escpos':
+            return self._generate_escpos_label(formatted['data'])
+        raise UserError(_('Cannot generate raw label data for format: %s') % label_format)
+
+    @api.model
+    @tools.ormcache('template')
+    def _resolve_template(self, template):
+        """
+        Resolve a QWeb template XML ID to its view ID.
+        
+        The lookup is cached per registry so repeated prints of the same
+        template skip the ir.model.data query; ir.qweb already caches the
+        compiled template by view ID.
+        
+        Args:
+            template (str): Template reference (e.g., 'module.template_name')
+            
+        Returns:
+            int: ID of the template view
+            
+        Raises:
+            ValueError: If the template does not exist
+        """
+        return self.env.ref(template).id
+
+    @api.model
+    def _queue_job_available(self):
+        """
+        Check whether the OCA queue_job module is installed.
+        
+        When it is, print requests can be deferred with with_delay() so the
+        HTTP worker returns as soon as the job is enqueued.
+        
+        Returns:
+            bool: True if with_delay() can be used
+        """
+        return 'queue.job' in self.env
+
+    def _render_template(self, template, data, template_id=None):
         """
         Render a QWeb template with data.
         
@@ -628,6 +865,7 @@ class QZPrintService(models.AbstractModel):
         Args:
             template (str): Template reference
             data (dict): Template data
+            template_id (int): Already resolved template view ID (optional)
             
         Returns:
             str: Rendered HTML with embedded resources
@@ -638,21 +876,22 @@ class QZPrintService(models.AbstractModel):
         if not isinstance(data, dict):
             raise ValidationError(_('Template data must be a dictionary'))
         
-        # Get the template view
-        template_view = self.env.ref(template)
-        
-        # Prepare rendering context
-        render_context = data.copy()
+        # Get the template view, unless the caller already resolved it
+        if not template_id:
+            template_id = self._resolve_template(template)
         
-        # Add helper functions for resource embedding
-        render_context['embed_image'] = self._embed_image
-        render_context['generate_barcode'] = self._generate_barcode
+        # Prepare rendering context with helper functions for resource embedding
+        render_context = {
+            **data,
+            'embed_image': self._embed_image,
+            'generate_barcode': self._generate_barcode,
+        }
         
         # Render using ir.qweb
         try:
-            rendered = self.env['ir.qweb']._render(template_view.id, render_context)
+            rendered = self.env['ir.qweb']._render(template_id, render_context)
         except Exception as e:
-            _logger.error(f'QWeb rendering error: {str(e)}')
+            _logger.error('QWeb rendering error: %s', e)
             raise UserError(_('Template rendering failed: %s') % str(e))
         
         # Convert bytes to string if needed
@@ -678,14 +917,13 @@ class QZPrintService(models.AbstractModel):
         if not image_data:
             return ''
         
-        # Encode to base64
+        # Encode to base64; the company logo is embedded in every receipt,
+        # so binary data goes through a small memoized encoder
         if isinstance(image_data, bytes):
-            encoded = base64.b64encode(image_data).decode('utf-8')
-        else:
-            # Assume it's already base64 encoded
-            encoded = image_data
+            return _image_data_uri(image_data, mime_type)
         
-        return f'data:{mime_type};base64,{encoded}'
+        # Assume it's already base64 encoded
+        return f'data:{mime_type};base64,{image_data}'
 
     def _generate_barcode(self, value, barcode_type='Code128', width=200, height=50):
         """
@@ -701,20 +939,15 @@ class QZPrintService(models.AbstractModel):
             str: Data URI for barcode image
         """
         try:
-            # Use Odoo's barcode generation if available
             # This is a placeholder - actual implementation would use
             # a barcode library like python-barcode or qrcode
-            import io
-            
-            # For now, return a placeholder
-            # In production, this would generate actual barcodes
             _logger.warning('Barcode generation not fully implemented - returning placeholder')
             
-            # Return empty data URI as placeholder
-            return 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+            # Return the shared empty data URI as placeholder
+            return _BARCODE_PLACEHOLDER_URI
             
         except Exception as e:
-            _logger.error(f'Barcode generation failed: {str(e)}')
+            _logger.error('Barcode generation failed: %s', e)
             return ''
 
     def _process_embedded_resources(self, html):
@@ -748,7 +981,7 @@ class QZPrintService(models.AbstractModel):
         5. Fall back to system default if no match
         
         Args:
-            printer (int|str|None): Printer ID, name, or None
+            printer (int|str|qz.printer|None): Printer ID, name, record, or None
             document_type (str): Document type for automatic selection
             location (int): Location/company ID
             department (str): Department name
@@ -762,24 +995,26 @@ class QZPrintService(models.AbstractModel):
         
         # Step 1: Check for explicitly specified printer
         if printer:
-            if isinstance(printer, int):
+            if isinstance(printer, models.BaseModel):
+                # Printer record already selected by the caller
+                if not printer.active:
+                    raise ValidationError(_('Printer "%s" is not active') % printer.name)
+                return printer
+            elif isinstance(printer, int):
                 # Printer ID provided
                 printer_record = QZPrinter.browse(printer)
                 if not printer_record.exists():
                     raise ValidationError(_('Printer with ID %s not found') % printer)
                 if not printer_record.active:
                     raise ValidationError(_('Printer "%s" is not active') % printer_record.name)
-                _logger.info(f'Using explicitly specified printer (ID): {printer_record.name}')
+                _logger.info('Using explicitly specified printer (ID): %s', printer_record.name)
                 return printer_record
             elif isinstance(printer, str):
-                # Printer name provided
-                printer_record = QZPrinter.search([
-                    ('name', '=', printer),
-                    ('active', '=', True)
-                ], limit=1)
+                # Printer name provided; name lookups are cached by qz.printer
+                printer_record = QZPrinter.browse(QZPrinter._active_printer_id_by_name(printer))
                 if not printer_record:
                     raise ValidationError(_('Printer "%s" not found or not active') % printer)
-                _logger.info(f'Using explicitly specified printer (name): {printer_record.name}')
+                _logger.info('Using explicitly specified printer (name): %s', printer_record.name)
                 return printer_record
         
         # Step 2-5: Use automatic selection algorithm
@@ -787,26 +1022,27 @@ class QZPrintService(models.AbstractModel):
         if location is None:
             location = self.env.user.company_id.id if self.env.user.company_id else None
         
-        # Use printer model's comprehensive selection algorithm
-        printer_record = QZPrinter.get_default_printer(
+        # Use printer model's comprehensive selection algorithm (cached
+        # until a printer changes)
+        printer_record = QZPrinter.browse(QZPrinter._default_printer_id(
             printer_type=document_type,
             location_id=location,
             department=department
-        )
+        ))
         
         if printer_record:
             _logger.info(
-                f'Selected printer via algorithm: {printer_record.name} '
-                f'(type={document_type}, location={location}, dept={department})'
+                'Selected printer via algorithm: %s (type=%s, location=%s, dept=%s)',
+                printer_record.name, document_type, location, department
             )
             return printer_record
         
         # Step 6: Try to find any active printer as last resort (system default)
-        fallback_printer = QZPrinter.search([('active', '=', True)], limit=1, order='priority desc')
+        fallback_printer = QZPrinter.browse(QZPrinter._fallback_printer_id())
         
         if fallback_printer:
             _logger.warning(
-                f'No matching printer found, using fallback: {fallback_printer.name}'
+                'No matching printer found, using fallback: %s', fallback_printer.name
             )
             return fallback_printer
         
@@ -825,18 +1061,8 @@ class QZPrintService(models.AbstractModel):
         Returns:
             bool: True if supported
         """
-        format_field_map = {
-            'pdf': 'supports_pdf',
-            'html': 'supports_html',
-            'escpos': 'supports_escpos',
-            'zpl': 'supports_zpl',
-        }
-        
-        field_name = format_field_map.get(format)
-        if not field_name:
-            return False
-        
-        return getattr(printer, field_name, False)
+        field_name = _FORMAT_FIELD.get(format)
+        return bool(field_name and printer[field_name])
 
     def _create_print_job(self, printer_record, data, data_format, **options):
         """
@@ -844,7 +1070,7 @@ class QZPrintService(models.AbstractModel):
         
         Args:
             printer_record (qz.printer): Target printer
-            data (bytes): Print data
+            data (bytes|bytearray|memoryview): Print data
             data_format (str): Data format
             **options: Additional job options
             
@@ -880,7 +1106,7 @@ class QZPrintService(models.AbstractModel):
         # Create the job
         job = QZPrintJob.create(job_values)
         
-        _logger.info(f'Created print job {job.id} for printer {printer_record.name}')
+        _logger.info('Created print job %s for printer %s', job.id, printer_record.name)
         
         # Submit the job for processing
         job.submit_job()
@@ -902,22 +1128,16 @@ class QZPrintService(models.AbstractModel):
         Validates: Requirements 6.2
         """
         # Check printer's supported formats in order of preference for labels
-        # ZPL is preferred for label printers as it's most efficient
-        if printer.supports_zpl:
-            return 'zpl'
-        elif printer.supports_escpos:
-            return 'escpos'
-        elif printer.supports_html:
-            return 'html'
-        elif printer.supports_pdf:
-            return 'pdf'
-        else:
-            # Default to HTML as fallback
-            _logger.warning(
-                f'Printer {printer.name} has no explicitly supported formats, '
-                f'defaulting to HTML'
-            )
-            return 'html'
+        for label_format in _LABEL_FORMAT_PRIORITY:
+            if printer[_FORMAT_FIELD[label_format]]:
+                return label_format
+        
+        # Default to HTML as fallback
+        _logger.warning(
+            'Printer %s has no explicitly supported formats, defaulting to HTML',
+            printer.name
+        )
+        return 'html'
 
     def _generate_zpl_label(self, label_context):
         """
@@ -940,58 +1160,21 @@ class QZPrintService(models.AbstractModel):
         width_dots = int(width * dpi)
         height_dots = int(height * dpi)
         
-        # Start ZPL command
-        zpl = [
-            '^XA',  # Start format
-            f'^PW{width_dots}',  # Print width
-            f'^LL{height_dots}',  # Label length
-        ]
+        # Start format, print width and label length
+        zpl = [_zpl_header(width_dots, height_dots)]
         
         # Add product information if available
         product = label_context.get('product', {})
         if product:
-            # Product name
-            if product.get('name'):
-                zpl.extend([
-                    '^FO50,50',  # Field origin
-                    '^A0N,40,40',  # Font
-                    f'^FD{product["name"]}^FS',  # Field data
-                ])
-            
-            # Product code
-            if product.get('default_code'):
-                zpl.extend([
-                    '^FO50,100',
-                    '^A0N,30,30',
-                    f'^FDCode: {product["default_code"]}^FS',
-                ])
-            
-            # Price
-            if product.get('list_price'):
-                zpl.extend([
-                    '^FO50,150',
-                    '^A0N,35,35',
-                    f'^FDPrice: ${product["list_price"]:.2f}^FS',
-                ])
-            
-            # Barcode
-            if product.get('barcode'):
-                barcode_type = label_context.get('barcode_type', 'Code128')
-                zpl.extend([
-                    '^FO50,200',
-                    '^BY3',  # Bar width
-                    f'^BC,100,Y,N,N',  # Code128 barcode
-                    f'^FD{product["barcode"]}^FS',
-                ])
+            zpl.extend(
+                block.format(product[field])
+                for field, block in _ZPL_PRODUCT_BLOCKS
+                if product.get(field)
+            )
         
         # Add custom barcode if specified separately
         elif label_context.get('barcode_value'):
-            zpl.extend([
-                '^FO50,100',
-                '^BY3',
-                '^BC,100,Y,N,N',
-                f'^FD{label_context["barcode_value"]}^FS',
-            ])
+            zpl.append(_ZPL_BARCODE_BLOCK.format(label_context['barcode_value']))
         
         # End format
         zpl.append('^XZ')
@@ -1009,56 +1192,47 @@ class QZPrintService(models.AbstractModel):
             label_context (dict): Label data context
             
         Returns:
-            str: ESC/POS command string
+            bytes: ESC/POS command data
         """
-        # ESC/POS commands
-        ESC = '\x1b'
-        GS = '\x1d'
-        
-        commands = []
+        commands = bytearray()
         
         # Initialize printer
-        commands.append(f'{ESC}@')  # Initialize
-        commands.append(f'{ESC}a\x01')  # Center alignment
+        commands += _ESCPOS_INIT  # Initialize
+        commands += _ESCPOS_ALIGN_CENTER  # Center alignment
         
         # Add product information if available
         product = label_context.get('product', {})
         if product:
             # Product name (large text)
             if product.get('name'):
-                commands.append(f'{ESC}!\x30')  # Double height and width
-                commands.append(product['name'])
-                commands.append('\n')
-                commands.append(f'{ESC}!\x00')  # Normal text
+                commands += _ESCPOS_DOUBLE_SIZE  # Double height and width
+                commands += product['name'].encode('utf-8')
+                commands += b'\n'
+                commands += _ESCPOS_NORMAL_SIZE  # Normal text
             
             # Product code
             if product.get('default_code'):
-                commands.append(f'Code: {product["default_code"]}\n')
+                commands += f'Code: {product["default_code"]}\n'.encode('utf-8')
             
             # Price
             if product.get('list_price'):
-                commands.append(f'{ESC}!\x20')  # Double height
-                commands.append(f'Price: ${product["list_price"]:.2f}\n')
-                commands.append(f'{ESC}!\x00')  # Normal text
+                commands += _ESCPOS_DOUBLE_HEIGHT  # Double height
+                commands += f'Price: ${product["list_price"]:.2f}\n'.encode('utf-8')
+                commands += _ESCPOS_NORMAL_SIZE  # Normal text
             
             # Barcode (if supported)
             if product.get('barcode'):
-                commands.append('\n')
+                commands += b'\n'
                 # Note: Barcode printing in ESC/POS varies by printer model
                 # This is a basic implementation
-                commands.append(f'{GS}k\x49')  # CODE128
-                commands.append(f'{chr(len(product["barcode"]))}')
-                commands.append(product['barcode'])
+                commands += _escpos_barcode(product['barcode'])
         
         # Add custom barcode if specified separately
         elif label_context.get('barcode_value'):
-            barcode = label_context['barcode_value']
-            commands.append(f'{GS}k\x49')
-            commands.append(f'{chr(len(barcode))}')
-            commands.append(barcode)
+            commands += _escpos_barcode(label_context['barcode_value'])
         
         # Feed and cut
-        commands.append('\n\n\n')
-        commands.append(f'{GS}V\x00')  # Full cut
+        commands += b'\n\n\n'
+        commands += _ESCPOS_FULL_CUT  # Full cut
         
-        return ''.join(commands)
+        return bytes(commands)
@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 import logging
+import re
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
 _logger = logging.getLogger(__name__)
 
+# Template categories detected from view key/name, in order of precedence
+_CATEGORY_ORDER = ('receipt', 'label', 'invoice', 'report', 'document')
+_CATEGORY_RE = re.compile('|'.join(_CATEGORY_ORDER), re.IGNORECASE)
+
 
 class QZPrintTemplate(models.Model):
     """
@@ -96,14 +101,19 @@ class QZPrintTemplate(models.Model):
     @api.depends('template_id')
     def _compute_usage_count(self):
         """Compute the number of print jobs using this template."""
+        counts = {}
+        if self.template_id:
+            # Count the jobs of all templates in a single grouped query
+            counts = {
+                view.id: count
+                for view, count in self.env['qz.print.job']._read_group(
+                    [('template_id', 'in', self.template_id.ids)],
+                    ['template_id'],
+                    ['__count'],
+                )
+            }
         for template in self:
-            if template.template_id:
-                count = self.env['qz.print.job'].search_count([
-                    ('template_id', '=', template.template_id.id)
-                ])
-                template.usage_count = count
-            else:
-                template.usage_count = 0
+            template.usage_count = counts.get(template.template_id.id, 0)
 
     @api.model
     def scan_and_register_templates(self):
@@ -130,39 +140,41 @@ class QZPrintTemplate(models.Model):
             ('name', 'ilike', 'print'),
         ])
         
-        registered_count = 0
-        updated_count = 0
+        now = fields.Datetime.now()
         skipped_count = 0
         
-        for view in templates_to_register:
-            # Check if already registered
-            existing = self.search([('template_id', '=', view.id)])
-            
-            if existing:
-                # Update existing registration
-                existing.write({
-                    'last_updated': fields.Datetime.now(),
-                })
-                updated_count += 1
-                _logger.debug(f'Updated template registration: {view.key}')
-            else:
-                # Determine category from template key/name
-                category = self._determine_category(view)
-                
-                # Create new registration
+        # Update the existing registrations in one query
+        existing = self.search([('template_id', 'in', templates_to_register.ids)])
+        if existing:
+            existing.write({
+                'last_updated': now,
+            })
+        updated_count = len(existing)
+        
+        # Create the missing registrations in a single call
+        registered_views = set(existing.template_id.ids)
+        new_views = templates_to_register.filtered(lambda view: view.id not in registered_views)
+        vals_list = [{
+            'name': view.name or view.key,
+            'template_id': view.id,
+            'category': self._determine_category(view),
+            'description': f'Auto-registered template: {view.key}',
+            'last_updated': now,
+        } for view in new_views]
+        
+        try:
+            with self.env.cr.savepoint():
+                self.create(vals_list)
+        except Exception:
+            # Register one by one so a single bad view does not block the rest
+            for view, vals in zip(new_views, vals_list):
                 try:
-                    self.create({
-                        'name': view.name or view.key,
-                        'template_id': view.id,
-                        'category': category,
-                        'description': f'Auto-registered template: {view.key}',
-                        'last_updated': fields.Datetime.now(),
-                    })
-                    registered_count += 1
-                    _logger.info(f'Registered new template: {view.key}')
+                    with self.env.cr.savepoint():
+                        self.create(vals)
                 except Exception as e:
                     _logger.warning(f'Failed to register template {view.key}: {str(e)}')
                     skipped_count += 1
+        registered_count = len(vals_list) - skipped_count
         
         result = {
             'registered': registered_count,
@@ -189,21 +201,12 @@ class QZPrintTemplate(models.Model):
         Returns:
             str: Category identifier
         """
-        key_lower = (view.key or '').lower()
-        name_lower = (view.name or '').lower()
-        
-        if 'receipt' in key_lower or 'receipt' in name_lower:
-            return 'receipt'
-        elif 'label' in key_lower or 'label' in name_lower:
-            return 'label'
-        elif 'invoice' in key_lower or 'invoice' in name_lower:
-            return 'invoice'
-        elif 'report' in key_lower or 'report' in name_lower:
-            return 'report'
-        elif 'document' in key_lower or 'document' in name_lower:
-            return 'document'
-        else:
-            return 'other'
+        # Find every category keyword in one pass, then apply the precedence
+        found = {
+            match.lower()
+            for match in _CATEGORY_RE.findall(f'{view.key or ""} {view.name or ""}')
+        }
+        return next((category for category in _CATEGORY_ORDER if category in found), 'other')
 
     @api.model
     def get_templates_by_category(self, category):
@@ -248,37 +251,48 @@ class QZPrintTemplate(models.Model):
         
         Validates: Requirements 8.5
         """
+        if not self:
+            return
+        
+        # The raw UPDATE below bypasses write(), so enforce its access rights
+        self.check_access('write')
+        
+        # Bump every version in a single UPDATE rather than one write per
+        # template (each template gets its own version + 1)
+        now = fields.Datetime.now()
+        self.flush_recordset(['version', 'last_updated'])
+        self.env.cr.execute("""
+            UPDATE qz_print_template
+               SET version = version + 1,
+                   last_updated = %s,
+                   write_uid = %s,
+                   write_date = %s
+             WHERE id IN %s
+        """, (now, self.env.uid, now, tuple(self.ids)))
+        self.invalidate_recordset(['version', 'last_updated', 'write_uid', 'write_date'])
+        
         for template in self:
-            template.write({
-                'version': template.version + 1,
-                'last_updated': fields.Datetime.now(),
-            })
             _logger.info(
                 f'Incremented template version: {template.name} -> v{template.version}'
             )
-            
-            # Clear template cache to ensure new version is used
-            self._clear_template_cache(template.template_id)
+        
+        # Clear template cache once to ensure the new versions are used
+        self._clear_template_cache(self.template_id)
 
-    def _clear_template_cache(self, view):
+    def _clear_template_cache(self, views):
         """
-        Clear the QWeb template cache for a specific view.
+        Clear the QWeb template cache for the given views.
         
         Args:
-            view (ir.ui.view): The view to clear from cache
+            views (ir.ui.view): The views to clear from cache
         """
-        # Clear the view cache
-        if hasattr(self.env['ir.qweb'], '_compiled_cache'):
-            # Clear compiled template cache
-            cache = self.env['ir.qweb']._compiled_cache
-            if view.id in cache:
-                del cache[view.id]
-                _logger.debug(f'Cleared template cache for view {view.id}')
+        # Clear the compiled template cache (signalled to the other workers)
+        self.env.registry.clear_cache('templates')
         
         # Invalidate the view cache
-        view.invalidate_recordset(['arch', 'arch_db'])
+        views.invalidate_recordset(['arch', 'arch_db'])
         
-        _logger.info(f'Template cache cleared for: {view.key}')
+        _logger.info('Template cache cleared for: %s', ', '.join(filter(None, views.mapped('key'))))
 
     @api.model
     def register_template(self, template_key, name=None, category='other', description=None):
@@ -354,31 +368,26 @@ class QZPrintTemplate(models.Model):
         """
         _logger.info('Checking for template updates')
         
-        updated_count = 0
-        checked_count = 0
-        
         # Get all active registered templates
         templates = self.search([('active', '=', True)])
+        checked_count = len(templates)
         
-        for template in templates:
-            checked_count += 1
-            
-            if not template.template_id:
-                continue
-            
-            view = template.template_id
-            
-            # Compare write dates
-            if view.write_date and template.last_updated:
-                if view.write_date > template.last_updated:
-                    # Template has been updated
-                    template.increment_version()
-                    updated_count += 1
-                    _logger.info(
-                        f'Detected update for template {template.name}: '
-                        f'view write_date={view.write_date}, '
-                        f'last_updated={template.last_updated}'
-                    )
+        # Compare write dates to find the templates whose view has been updated
+        stale = templates.filtered(
+            lambda template: template.template_id.write_date
+            and template.last_updated
+            and template.template_id.write_date > template.last_updated
+        )
+        for template in stale:
+            _logger.info(
+                f'Detected update for template {template.name}: '
+                f'view write_date={template.template_id.write_date}, '
+                f'last_updated={template.last_updated}'
+            )
+        
+        # Increment all stale versions at once
+        stale.increment_version()
+        updated_count = len(stale)
         
         result = {
             'checked': checked_count,
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 import logging
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
 _logger = logging.getLogger(__name__)
 
+# Fields the cached printer lookups depend on; writing any other field
+# leaves the caches untouched
+_CACHED_LOOKUP_FIELDS = frozenset((
+    'name', 'system_name', 'printer_type', 'location_id', 'department',
+    'is_default', 'priority', 'active',
+))
+
 
 class QZPrinter(models.Model):
     _name = 'qz.printer'
@@ -213,31 +220,35 @@ class QZPrinter(models.Model):
                 'message': _('No printers found')
             }
         
-        created_printers = []
-        updated_printers = []
-        
-        for printer_name in printer_list:
-            # Check if printer already exists
-            existing_printer = self.search([('system_name', '=', printer_name)], limit=1)
-            
-            if existing_printer:
-                # Update existing printer
-                existing_printer.write({
-                    'active': True,
-                })
-                updated_printers.append(existing_printer.name)
-            else:
-                # Create new printer record
-                # Try to detect printer type from name
-                printer_type = self._detect_printer_type(printer_name)
-                
-                new_printer = self.create({
-                    'name': printer_name,
-                    'system_name': printer_name,
-                    'printer_type': printer_type,
-                    'active': True,
-                })
-                created_printers.append(new_printer.name)
+        printer_names = list(dict.fromkeys(printer_list))
+        
+        # Look up the existing printers in one query
+        existing_by_name = {}
+        for printer in self.search([('system_name', 'in', printer_names)]):
+            existing_by_name.setdefault(printer.system_name, printer)
+        
+        # Update existing printers
+        existing_printers = self.browse([
+            existing_by_name[name].id for name in printer_names if name in existing_by_name
+        ])
+        # Only write printers that actually change, so rediscovering
+        # printers that are already active doesn't touch them
+        printers_to_activate = existing_printers.filtered(lambda printer: not printer.active)
+        if printers_to_activate:
+            printers_to_activate.write({
+                'active': True,
+            })
+        updated_printers = existing_printers.mapped('name')
+        
+        # Create the new printer records in a single call, detecting the
+        # printer type from the name
+        new_printers = self.create([{
+            'name': name,
+            'system_name': name,
+            'printer_type': self._detect_printer_type(name),
+            'active': True,
+        } for name in printer_names if name not in existing_by_name])
+        created_printers = new_printers.mapped('name')
         
         # Build result message
         message_parts = []
@@ -408,6 +419,80 @@ class QZPrinter(models.Model):
         
         return best_printer
     
+    @api.model
+    @tools.ormcache('self.env.company.id')
+    def _default_receipt_printer_id(self):
+        """
+        Get the ID of the default receipt printer for the current company
+        
+        The result is cached per company and invalidated whenever a printer
+        is created, modified or deleted.
+        
+        Returns:
+            int: Printer ID or False if no default receipt printer exists
+        """
+        printer = self.sudo().search([
+            ('printer_type', '=', 'receipt'),
+            ('is_default', '=', True),
+            ('active', '=', True),
+            ('location_id', 'in', [self.env.company.id, False]),
+        ], limit=1)
+        return printer.id or False
+    
+    @api.model
+    @tools.ormcache('name')
+    def _active_printer_id_by_name(self, name):
+        """
+        Get the ID of the active printer with the given name
+        
+        The result is cached and invalidated whenever a printer is created,
+        modified or deleted.
+        
+        Returns:
+            int: Printer ID or False if no active printer has that name
+        """
+        printer = self.sudo().search([
+            ('name', '=', name),
+            ('active', '=', True),
+        ], limit=1)
+        return printer.id or False
+    
+    @api.model
+    @tools.ormcache()
+    def _fallback_printer_id(self):
+        """
+        Get the ID of the highest priority active printer
+        
+        Used as the system-wide last resort when no printer matches the
+        selection algorithm. The result is cached and invalidated whenever a
+        printer is created, modified or deleted.
+        
+        Returns:
+            int: Printer ID or False if there is no active printer
+        """
+        printer = self.sudo().search([('active', '=', True)], limit=1, order='priority desc')
+        return printer.id or False
+    
+    @api.model
+    @tools.ormcache('self.env.company.id', 'printer_type', 'location_id', 'department')
+    def _default_printer_id(self, printer_type=None, location_id=None, department=None):
+        """
+        Get the ID of the default printer for a type, location and department
+        
+        Memoized wrapper around get_default_printer. The result is cached per
+        company and invalidated whenever a printer is created, modified or
+        deleted.
+        
+        Returns:
+            int: Printer ID or False if no match found
+        """
+        printer = self.sudo().get_default_printer(
+            printer_type=printer_type,
+            location_id=location_id,
+            department=department
+        )
+        return printer.id if printer else False
+    
     def test_print(self):
         """
         Send a test page to this printer
@@ -443,6 +528,23 @@ class QZPrinter(models.Model):
             }
         }
 
+    def _invalidate_cache(self):
+        """Drop the ormcached printer lookups"""
+        self.env.registry.clear_cache()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to invalidate the cached printer lookups"""
+        records = super(QZPrinter, self).create(vals_list)
+        self._invalidate_cache()
+        return records
+
+    def unlink(self):
+        """Override unlink to invalidate the cached printer lookups"""
+        result = super(QZPrinter, self).unlink()
+        self._invalidate_cache()
+        return result
+
     def write(self, vals):
         """
         Override write to detect when printer comes online
@@ -458,6 +560,8 @@ class QZPrinter(models.Model):
         
         # Call parent write method
         result = super(QZPrinter, self).write(vals)
+        if _CACHED_LOOKUP_FIELDS.intersection(vals):
+            self._invalidate_cache()
         
         # Process queued jobs for printers that came online
         if printers_to_process:
@@ -93,7 +93,9 @@ export class PrintJobMonitor extends Component {
      */
     async loadPrinters() {
         try {
-            const result = await this.rpc('/qz_tray/printers', {});
+            // Plain GET endpoint (not JSON-RPC)
+            const response = await fetch('/qz_tray/printers');
+            const result = await response.json();
             this.state.printers = result.printers || [];
         } catch (error) {
             console.error('Failed to load printers:', error);
@@ -7,9 +7,9 @@ import { registry } from "@web/core/registry";
  * Frontend service for managing print operations and job status monitoring
  */
 export const printService = {
-    dependencies: ["qz_connector", "rpc", "notification", "dialog"],
+    dependencies: ["qz_connector", "rpc", "notification", "dialog", "bus_service"],
     
-    async start(env, { qz_connector, rpc, notification, dialog }) {
+    async start(env, { qz_connector, rpc, notification, dialog, bus_service }) {
         const jobStatusCache = new Map();
         const jobMonitoringIntervals = new Map();
         
@@ -19,7 +19,7 @@ export const printService = {
          * @param {Object} data - Data to pass to the template
          * @param {number|string|null} printerId - Optional printer ID or name
          * @param {Object} options - Additional print options
-         * @returns {Promise<number>} Job ID
+         * @returns {Promise<number|null>} Job ID, or null when deferred to queue_job
          */
         async function printDocument(documentType, data, printerId = null, options = {}) {
             try {
@@ -40,6 +40,14 @@ export const printService = {
                     throw new Error(result.error);
                 }
                 
+                // Deferred through queue_job: no print job record exists yet
+                if (result.queued) {
+                    notification.add('Print job queued for processing', {
+                        type: 'info',
+                    });
+                    return null;
+                }
+                
                 const jobId = result.job_id;
                 
                 // Display submission confirmation
@@ -66,7 +74,7 @@ export const printService = {
          * @param {string} format - Data format (pdf, html, escpos, zpl)
          * @param {number|string|null} printerId - Optional printer ID or name
          * @param {Object} options - Additional print options
-         * @returns {Promise<number>} Job ID
+         * @returns {Promise<number|null>} Job ID, or null when deferred to queue_job
          */
         async function printRaw(data, format, printerId = null, options = {}) {
             try {
@@ -87,6 +95,14 @@ export const printService = {
                     throw new Error(result.error);
                 }
                 
+                // Deferred through queue_job: no print job record exists yet
+                if (result.queued) {
+                    notification.add('Print job queued for processing', {
+                        type: 'info',
+                    });
+                    return null;
+                }
+                
                 const jobId = result.job_id;
                 
                 // Display submission confirmation
@@ -140,7 +156,9 @@ export const printService = {
          */
         async function getJobStatus(jobId) {
             try {
-                const result = await rpc(`/qz_tray/job/${jobId}/status`, {});
+                // Plain GET endpoint (not JSON-RPC) to keep polling cheap
+                const response = await fetch(`/qz_tray/job/${jobId}/status`);
+                const result = await response.json();
                 
                 if (result.error) {
                     throw new Error(result.error);
@@ -329,6 +347,15 @@ export const printService = {
             }
         }
         
+        // Final states of jobs submitted in the background (e.g. queued POS
+        // receipts) are pushed by the server; polled jobs are reported already
+        bus_service.subscribe("qz_print_status", (payload) => {
+            if (jobMonitoringIntervals.has(payload.job_id)) {
+                return;
+            }
+            handleStatusChange(payload.job_id, payload);
+        });
+        
         // Return service API
         return {
             printDocument,
@@ -89,7 +89,8 @@ export const qzConnectorService = {
          * Connect to QZ Tray
          */
         async function connect() {
-            if (connected) {
+            // Reuse the open socket; a stale flag with a closed socket reconnects
+            if (isConnected()) {
                 return true;
             }
             
@@ -122,11 +123,16 @@ export const qzConnectorService = {
                     throw new Error('Failed to setup certificate authentication');
                 }
                 
-                // Attempt connection
+                // Attempt connection, keeping the socket alive between print jobs
                 if (!qz.websocket.isActive()) {
-                    await qz.websocket.connect();
+                    await qz.websocket.connect({ keepAlive: 60 });
                 }
                 
+                // Drop the connected flag as soon as QZ Tray closes the socket
+                qz.websocket.setClosedCallbacks(() => {
+                    connected = false;
+                });
+                
                 connected = true;
                 connecting = false;
                 
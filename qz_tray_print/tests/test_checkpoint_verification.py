@@ -448,7 +448,8 @@ class TestCheckpointVerification(TransactionCase):
             })
         
         # Process queued jobs
-        result = self.env['qz.print.job'].process_queued_jobs()
+        # Process inline rather than dispatching to queue_job when installed
+        result = self.env['qz.print.job'].with_context(queue_job__no_delay=True).process_queued_jobs()
         
         self.assertIn('processed', result, 'Result should contain processed count')
         self.assertIn('failed', result, 'Result should contain failed count')
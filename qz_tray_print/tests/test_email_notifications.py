@@ -184,9 +184,9 @@ class TestEmailNotifications(TransactionCase):
         # Call notification method
         job._notify_admin_failure()
         
-        # Find the sent email
+        # Find the sent email (one email addressed to all administrators)
         emails = self.env['mail.mail'].search([
-            ('email_to', '=', self.admin_user.email)
+            ('email_to', 'ilike', self.admin_user.email)
         ], order='id desc', limit=1)
         
         if emails:
@@ -233,3 +233,38 @@ class TestNotificationProperties(TransactionCase):
                         "Queued job should complete successfully")
         self.assertIsNotNone(job.completed_date,
                            "Completed queued job should have completion date")
+
+    def test_admin_failure_single_email(self):
+        """
+        A job failing after its retries sends one email addressed to every
+        print administrator with an email address
+        """
+        admin_group = self.env.ref('qz_tray_print.group_qz_print_admin')
+        admins = self.env['res.users'].create([{
+            'name': f'Failure Admin {i}',
+            'login': f'qz_failure_admin_{i}',
+            'email': f'qz_failure_admin_{i}@example.com',
+            'groups_id': [(4, admin_group.id)],
+        } for i in range(2)])
+        self.env['ir.config_parameter'].sudo().set_param(
+            'qz_tray.email_notifications_enabled', 'True'
+        )
+        # Keep the sent email around so it can be inspected
+        self.env.ref('qz_tray_print.email_template_print_job_failure').auto_delete = False
+        
+        job = self.env['qz.print.job'].create({
+            'document_type': 'receipt',
+            'printer_id': self.printer.id,
+            'state': 'failed',
+            'error_message': 'Printer offline error',
+        })
+        mails_before = self.env['mail.mail'].search([])
+        
+        job._notify_admin_failure()
+        
+        mails = self.env['mail.mail'].search([]) - mails_before
+        self.assertEqual(len(mails), 1,
+                        "One email should be sent for all administrators")
+        for admin in admins:
+            self.assertIn(admin.email, mails.email_to,
+                         "Every administrator should be a recipient")
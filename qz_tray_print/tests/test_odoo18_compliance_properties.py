@@ -6,7 +6,8 @@ Testing name field uniqueness and non-emptiness properties
 import logging
 import base64
 from hypothesis import given, strategies as st, settings
-from odoo.tests.common import TransactionCase
+from odoo.tests.common import TransactionCase, new_test_user
+from odoo.exceptions import AccessError, UserError
 
 _logger = logging.getLogger(__name__)
 
@@ -486,3 +487,43 @@ class TestOdoo18ComplianceProperties(TransactionCase):
             f"Backward compatibility test passed for job type: {job_data['document_type']}, "
             f"format: {job_data['data_format']}"
         )
+
+    def test_escpos_barcode_rejects_unencodable_values(self):
+        """ESC/POS barcodes are never printed with replaced or truncated data"""
+        from odoo.addons.qz_tray_print.models.qz_print_service import _escpos_barcode
+        
+        command = _escpos_barcode('5901234123457')
+        self.assertTrue(command.endswith(b'\x0d5901234123457'))
+        
+        with self.assertRaises(UserError):
+            _escpos_barcode('5901234é')
+        with self.assertRaises(UserError):
+            _escpos_barcode('1' * 256)
+
+    def test_template_version_requires_write_access(self):
+        """Only users allowed to edit templates can bump their version"""
+        print_user = new_test_user(
+            self.env, login='qz_version_print_user',
+            groups='base.group_user,qz_tray_print.group_qz_print_user',
+        )
+        print_manager = new_test_user(
+            self.env, login='qz_version_print_manager',
+            groups='base.group_user,qz_tray_print.group_qz_print_manager',
+        )
+        view = self.env.ref('qz_tray_print.receipt_template_default')
+        Template = self.env['qz.print.template'].with_context(active_test=False)
+        template = Template.search([('template_id', '=', view.id)]) or Template.create({
+            'name': 'Compliance Receipt Template',
+            'template_id': view.id,
+            'category': 'receipt',
+        })
+        version = template.version
+        
+        # Print users have read-only access to templates
+        with self.assertRaises(AccessError):
+            template.with_user(print_user).increment_version()
+        self.assertEqual(template.version, version, "Version should be unchanged")
+        
+        # Print managers can edit templates
+        template.with_user(print_manager).increment_version()
+        self.assertEqual(template.version, version + 1, "Version should be incremented")
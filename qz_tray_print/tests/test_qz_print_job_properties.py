@@ -568,6 +568,35 @@ class TestQZPrintJobProperties(TransactionCase):
             self.assertEqual(job.retry_count, expected_count,
                            f"Retry count should be {expected_count}")
 
+    def test_job_copy_resets_execution_fields(self):
+        """Test that copying a failed job keeps its parameters but not its execution state"""
+        job = self.QZPrintJob.create({
+            'document_type': 'receipt',
+            'printer_id': self.test_printer.id,
+            'data': base64.b64encode(b'test data'),
+            'data_format': 'pdf',
+            'copies': 2,
+            'priority': 7,
+        })
+        job.submit_job()
+        job.write({
+            'state': 'failed',
+            'error_message': 'Test error',
+            'retry_count': 2,
+        })
+        
+        new_job = job.copy()
+        
+        self.assertEqual(new_job.state, 'draft', "Copied job should start as draft")
+        self.assertFalse(new_job.error_message, "Copied job should have no error message")
+        self.assertEqual(new_job.retry_count, 0, "Copied job should reset retry count")
+        self.assertFalse(new_job.submitted_date, "Copied job should not be submitted")
+        self.assertFalse(new_job.completed_date, "Copied job should not be completed")
+        self.assertEqual(new_job.data, job.data, "Copied job should keep the print data")
+        self.assertEqual(new_job.copies, 2, "Copied job should keep the number of copies")
+        self.assertEqual(new_job.priority, 7, "Copied job should keep the priority")
+        self.assertNotEqual(new_job.name, job.name, "Copied job should get a new name")
+
     def test_job_cancellation(self):
         """Test that jobs can be cancelled"""
         job = self.QZPrintJob.create({
@@ -1141,3 +1170,65 @@ class TestQZPrintJobProperties(TransactionCase):
         # Verify link to original job
         self.assertEqual(resubmitted_job.parent_id, original_job.id,
                         "Resubmitted job should reference original job")
+
+    def test_queue_dispatch_one_job_per_printer(self):
+        """
+        With queue_job, the cron hands each printer's queue to one background
+        job, deduplicated per printer by its identity key
+        """
+        if 'queue.job' not in self.env:
+            self.skipTest('queue_job is not installed')
+        from odoo.addons.queue_job.tests.common import trap_jobs
+        from odoo.addons.qz_tray_print.models.qz_print_service import QZ_PRINT_CHANNEL
+        
+        jobs = self.QZPrintJob.create([{
+            'document_type': 'receipt',
+            'printer_id': self.test_printer.id,
+            'data': base64.b64encode(b'dispatch %d' % i),
+            'data_format': 'html',
+            'state': 'queued',
+        } for i in range(2)])
+        
+        with trap_jobs() as trap:
+            result = self.QZPrintJob.process_queued_jobs()
+            
+            trap.assert_jobs_count(1, only=self.QZPrintJob._process_printer_queue)
+            trap.assert_enqueued_job(
+                self.QZPrintJob._process_printer_queue,
+                args=(self.test_printer.id,),
+                properties={
+                    'channel': QZ_PRINT_CHANNEL,
+                    'identity_key': f'qz.print.job._process_printer_queue-{self.test_printer.id}',
+                },
+            )
+            self.assertEqual(result['dispatched'], 1,
+                           "Printer queue should be dispatched to a background job")
+            self.assertEqual(set(jobs.mapped('state')), {'queued'},
+                           "Jobs should stay queued until the background job runs")
+            
+            trap.perform_enqueued_jobs()
+        
+        self.assertNotIn('queued', jobs.mapped('state'),
+                        "Background job should process the printer's queue")
+
+    def test_queue_processing_inline(self):
+        """
+        With queue_job__no_delay, the cron processes printer queues inline
+        whether or not queue_job is installed
+        """
+        jobs = self.QZPrintJob.create([{
+            'document_type': 'receipt',
+            'printer_id': self.test_printer.id,
+            'data': base64.b64encode(b'inline %d' % i),
+            'data_format': 'html',
+            'state': 'queued',
+        } for i in range(2)])
+        
+        result = self.QZPrintJob.with_context(queue_job__no_delay=True).process_queued_jobs()
+        
+        self.assertNotIn('dispatched', result,
+                        "Queues should not be dispatched to background jobs")
+        self.assertGreaterEqual(result['processed'] + result['failed'], len(jobs),
+                        "Every queued job should be processed inline")
+        self.assertNotIn('queued', jobs.mapped('state'),
+                        "Processed jobs should leave the queue")